@@ -0,0 +1,59 @@
+# bench/bench_build_site.py
+"""
+build_site incremental: build completo de N meses vs re-build sin cambios vs publicar un mes
+nuevo (solo renderiza ese mes + índice), y build completo con 1 vs N procesos (la ganancia
+requiere N núcleos: el render es CPU puro).
+
+    python -m bench.bench_build_site --pages 60 --workers 4
+"""
+import json, time, argparse, tempfile
+from pathlib import Path
+import build_site as S
+from eda.artifact import write_artifact, month_iso, month_int
+from bench.bench_eda_artifact import synthetic_eda
+from bench.bench_render import NARR
+
+def _eda_month(months, i):
+    """EDA sintético cuyo latest_period es el i-ésimo mes desde 2020-01."""
+    e = synthetic_eda(months, seed=i)
+    shift = month_int("2020-01-01") + i - month_int(e["latest_period"])
+    idx = [month_iso(month_int(d) + shift) for d in e["neto_timeseries"]["index"]]
+    e["neto_timeseries"]["index"] = idx
+    e["monthly_total"] = [{**r, "period": d} for r, d in zip(e["monthly_total"], idx)]
+    e["latest_period"] = idx[-1]
+    return e
+
+def _add_month(root, i, months):
+    e = _eda_month(months, i)
+    p = root/"eda"/f"eda_{e['latest_period'][:7]}.json"
+    p.write_text(json.dumps(e, ensure_ascii=False, indent=2), encoding="utf-8")
+    write_artifact(e, p.with_suffix(".bin"))
+    S.save_narrative({**NARR, "title": f"Portabilidad {e['latest_period'][:7]}"}, e["latest_period"], root/"narr")
+
+def _timed(root, out, **kw):
+    t0 = time.perf_counter()
+    m = S.build_site(root/"eda", root/"narr", out, assets="cdn", **kw)
+    return (time.perf_counter()-t0)*1000, sum(v["rebuilt"] for v in m["pages"].values())
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=60)
+    ap.add_argument("--months", type=int, default=132)
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+    root = Path(tempfile.mkdtemp(prefix="bench_site_"))
+    (root/"eda").mkdir()
+    for i in range(args.pages): _add_month(root, i, args.months)
+
+    for w in (1, args.workers):
+        ms, n = _timed(root, root/f"full_{w}", workers=w)
+        print(f"build completo  workers={w:<2} {ms:9.1f} ms  ({n} páginas)")
+    out = root/f"full_{args.workers}"
+    ms, n = _timed(root, out, workers=args.workers)
+    print(f"sin cambios                {ms:9.1f} ms  ({n} páginas)")
+    _add_month(root, args.pages, args.months)
+    ms, n = _timed(root, out, workers=args.workers)
+    print(f"mes nuevo publicado        {ms:9.1f} ms  ({n} página)")
+
+if __name__ == "__main__":
+    main()
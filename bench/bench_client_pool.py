@@ -0,0 +1,67 @@
+# bench/bench_client_pool.py
+"""
+Latencia de consultas repetidas: un QdrantClient nuevo por llamada (comportamiento anterior
+de rag/retrieve._client) vs el cliente compartido de rag/qdrant_init.get_client().
+Usa el backend de embeddings 'hashing' y sin caché de resultados (RETRIEVE_CACHE=0) para aislar
+el costo de Qdrant.
+
+    python -m bench.bench_client_pool --points 2000 --n 50
+"""
+import os, time, argparse, tempfile, statistics
+os.environ.setdefault("EMBED_BACKEND", "hashing")
+os.environ.setdefault("RETRIEVE_CACHE", "0")          # si no, las consultas repetidas salen del SQLite
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+from rag.embed_client import embed, index_meta
+from rag.qdrant_init import ensure_collection, close_client, warmup
+from rag.retrieve import retrieve, _search, retrieve_for_month
+
+def _report(name, lat, base=None):
+    p50 = statistics.median(lat)*1000
+    extra = f"  x{base/p50:.1f}" if base else ""
+    print(f"{name:<34} p50={p50:8.2f} ms  max={max(lat)*1000:8.2f} ms{extra}")
+    return p50
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--points", type=int, default=1000)
+    ap.add_argument("--n", type=int, default=30)
+    ap.add_argument("--path", default=None, help="QDRANT_LOCAL_PATH (default: carpeta temporal)")
+    args = ap.parse_args()
+    os.environ.pop("QDRANT_URL", None)
+    path = os.environ["QDRANT_LOCAL_PATH"] = args.path or tempfile.mkdtemp(prefix="bench_pool_")
+
+    coll = "bench_pool"
+    c = ensure_collection(coll, dim=index_meta()["dim"], index_meta=index_meta())
+    if c.count(coll).count == 0:
+        texts = [f"portabilidad móvil nota {i} mes {i%12+1} líneas portadas operadora" for i in range(args.points)]
+        vecs = embed(texts)
+        c.upsert(coll, points=[PointStruct(id=i, vector=v, payload={"text": t, "url": f"u{i%40}",
+                               "date": f"2024-{i%12+1:02d}-01"}) for i, (t, v) in enumerate(zip(texts, vecs))])
+    close_client()   # libera el lock de qdrant_data para el modo "cliente por llamada"
+
+    q = "portabilidad Perú reporte mensual"
+    vec = embed([q])[0]
+    lat = []
+    for _ in range(args.n):
+        t0 = time.perf_counter()
+        cl = QdrantClient(path=path)
+        _search(cl, vec, 3, coll, None, 600)
+        cl.close()
+        lat.append(time.perf_counter()-t0)
+    base = _report("cliente nuevo por retrieve()", lat)
+
+    t0 = time.perf_counter(); warmup(coll); print(f"warm-up del cliente compartido: {(time.perf_counter()-t0)*1000:.1f} ms")
+    lat = []
+    for _ in range(args.n):
+        t0 = time.perf_counter(); retrieve(q, k=3, collection=coll); lat.append(time.perf_counter()-t0)
+    _report("cliente compartido (get_client)", lat, base)
+
+    lat = []
+    for _ in range(max(1, args.n//3)):
+        t0 = time.perf_counter(); retrieve_for_month("2025-01-01", collection=coll); lat.append(time.perf_counter()-t0)
+    _report("retrieve_for_month (compartido)", lat)
+    close_client()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# bench/bench_convert.py
+"""
+Páginas/s de HTML→Markdown: camino serial original (MarkItDown nuevo por página) vs
+conversor reutilizado vs pool de procesos, sobre un directorio de HTML guardados.
+
+    python -m bench.bench_convert --fixtures data/cache/web --procs 4
+"""
+import time, argparse
+from io import BytesIO
+from pathlib import Path
+from utils.html_md import html_to_markdown, convert_many, get_pool, shutdown_pool
+
+def legacy(html: bytes) -> str:
+    from markitdown import MarkItDown
+    return MarkItDown().convert_stream(BytesIO(html), extension=".html").text_content
+
+def _run(name, fn, htmls, base=None):
+    t0 = time.perf_counter(); out = fn(htmls); secs = time.perf_counter() - t0
+    rate = len(htmls) / secs if secs else float("inf")
+    extra = f"  x{rate/base:.2f}" if base else ""
+    print(f"{name:<22} {len(htmls):>5} págs  {secs:7.2f}s  {rate:8.1f} págs/s{extra}")
+    return out, rate
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fixtures", default="data/cache/web", help="Directorio con *.html")
+    ap.add_argument("--procs", type=int, default=None, help="Procesos del pool (default: núcleos)")
+    ap.add_argument("--repeat", type=int, default=1, help="Repite los fixtures N veces")
+    args = ap.parse_args()
+
+    htmls = [p.read_bytes() for p in sorted(Path(args.fixtures).glob("*.html"))] * args.repeat
+    if not htmls:
+        raise SystemExit(f"No hay *.html en {args.fixtures} (corre antes la ingesta para poblar la caché).")
+
+    ref, base = _run("serial (MarkItDown/pág)", lambda hs: [legacy(h) for h in hs], htmls)
+    _run("serial reutilizado", lambda hs: [html_to_markdown(h) for h in hs], htmls, base)
+    list(get_pool(args.procs).map(html_to_markdown, htmls[:16]))   # arranque del pool fuera de la medición
+    out, _ = _run("pool de procesos", lambda hs: convert_many(hs, processes=args.procs), htmls, base)
+    assert out == ref, "la conversión en pool no coincide con la serial"
+    shutdown_pool()
+
+if __name__ == "__main__":
+    main()
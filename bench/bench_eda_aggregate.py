@@ -0,0 +1,57 @@
+# bench/bench_eda_aggregate.py
+"""
+Agregados de build_eda: camino anterior (compute_monthly + compute_neto_por_operador + dos
+filtros por mes y reindex por operadora) vs eda.portabilidad.aggregate (una pasada con bincount),
+sobre un dataset sintético de varios millones de filas. Verifica que los resultados coincidan.
+
+    python -m bench.bench_eda_aggregate --rows 3000000
+"""
+import time, argparse
+import numpy as np, pandas as pd
+from bench.synth_punku import synthetic_df
+from eda.portabilidad import (BRAND_MAP, OPERADORAS, compute_monthly, compute_neto_por_operador,
+                              aggregate, _compact)
+
+def legacy(df, target):
+    monthly = compute_monthly(df)
+    neto_piv = compute_neto_por_operador(df)
+    g_mes = df[df["Mes"]==target].groupby("Receptor_b", observed=True)["Lineas"].sum()
+    p_mes = df[df["Mes"]==target].groupby("Cedente_b", observed=True)["Lineas"].sum()
+    tabla = []
+    for op in OPERADORAS:
+        won  = int(g_mes.reindex([op]).fillna(0).iloc[0])
+        lost = int(p_mes.reindex([op]).fillna(0).iloc[0])
+        tabla.append({"name":op,"won":won,"lost":lost,"net":won-lost})
+    return {"monthly": monthly, "neto_piv": neto_piv, "operators": tabla}
+
+def _best(fn, repeat):
+    ts = []
+    for _ in range(repeat):
+        t0 = time.perf_counter(); out = fn(); ts.append(time.perf_counter()-t0)
+    return min(ts), out
+
+def _same(a, b):
+    return (a["operators"] == b["operators"]
+            and a["monthly"].index.equals(b["monthly"].index)
+            and np.array_equal(a["monthly"].to_numpy(), b["monthly"].to_numpy())
+            and a["neto_piv"].index.equals(b["neto_piv"].index)
+            and np.array_equal(a["neto_piv"].to_numpy(), b["neto_piv"].to_numpy()))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=3_000_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    raw = synthetic_df(args.rows)
+    raw["Cedente_b"] = raw["Cedente"].map(BRAND_MAP).fillna(raw["Cedente"])
+    raw["Receptor_b"] = raw["Receptor"].map(BRAND_MAP).fillna(raw["Receptor"])
+    target = pd.Timestamp("2025-01-01")
+    print(f"{args.rows:,} filas, {raw['Mes'].nunique()} meses")
+    for name, df in (("object (read_excel)", raw), ("category (Parquet)", _compact(raw))):
+        t_old, a = _best(lambda: legacy(df, target), args.repeat)
+        t_new, b = _best(lambda: aggregate(df, target), args.repeat)
+        print(f"{name:<20} anterior {t_old*1000:8.1f} ms | aggregate {t_new*1000:8.1f} ms  "
+              f"x{t_old/t_new:.1f}  idéntico: {_same(a, b)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# bench/bench_eda_artifact.py
+"""
+Lectura de las ventanas que usa build_page (barras últimos N meses + neto 12m): JSON completo
+(json.loads + pandas sobre toda la historia) vs artefacto columnar eda_YYYY-MM.bin (cabecera +
+memmap de la ventana), para historias de distinto largo. Verifica que las ventanas coincidan.
+
+    python -m bench.bench_eda_artifact --months 132 1200 --n 200
+"""
+import json, time, argparse, tempfile, statistics
+from pathlib import Path
+import numpy as np
+from eda.artifact import write_artifact, load_eda, month_iso
+from build_page import last_n_months_from_monthly_total, last_12m_neto_timeseries
+
+def synthetic_eda(months: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    end = 2025*12 + 5
+    idx = [month_iso(m) for m in range(end-months+1, end+1)]
+    ops = ("CLARO","ENTEL","BITEL","MOVISTAR")
+    return {"topic": "portabilidad_movil_peru", "latest_period": idx[-1], "layout": "semestral",
+            "comparatives": {"mom_delta_pct": 0.01, "yoy_delta_pct": 0.1},
+            "monthly_total": [{"period": d, "lines": int(v)} for d, v in zip(idx, rng.integers(3e5, 7e5, months))],
+            "chart_last16": {"labels": [], "values": []},
+            "operators_current": [{"name": o, "won": 1, "lost": 1, "net": 0} for o in ops],
+            "neto_timeseries": {"index": idx, **{o: rng.integers(-3e4, 3e4, months).tolist() for o in ops}},
+            "recommendations": {"include_neto_timeseries": True}}
+
+def _read(path, bar_n):
+    eda = load_eda(path)
+    return last_n_months_from_monthly_total(eda, bar_n), last_12m_neto_timeseries(eda)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--months", type=int, nargs="+", default=[132, 1200])
+    ap.add_argument("--n", type=int, default=200)
+    ap.add_argument("--bar-months", type=int, default=16)
+    args = ap.parse_args()
+    tmp = Path(tempfile.mkdtemp(prefix="bench_artifact_"))
+    for months in args.months:
+        eda = synthetic_eda(months)
+        js = tmp/f"eda_{months}.json"
+        js.write_text(json.dumps(eda, ensure_ascii=False, indent=2), encoding="utf-8")
+        js_only = tmp/f"solo_{months}.json"; js_only.write_bytes(js.read_bytes())
+        write_artifact(eda, js.with_suffix(".bin"))
+        res = {}
+        for name, p in (("JSON", js_only), ("columnar", js)):
+            lat = []
+            for _ in range(args.n):
+                t0 = time.perf_counter(); out = _read(p, args.bar_months); lat.append(time.perf_counter()-t0)
+            res[name] = (statistics.median(lat)*1000, out)
+        (tj, a), (tc, b) = res["JSON"], res["columnar"]
+        print(f"{months:>5} meses  JSON {js.stat().st_size:>9,} B {tj:7.2f} ms | "
+              f".bin {js.with_suffix('.bin').stat().st_size:>8,} B {tc:7.2f} ms  x{tj/tc:.1f}  idéntico: {a == b}")
+
+if __name__ == "__main__":
+    main()
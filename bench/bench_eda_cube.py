@@ -0,0 +1,89 @@
+# bench/bench_eda_cube.py
+"""
+Cubo de agregados (eda/cube.py): construir el cubo sobre un dataset sintético grande y
+aggregate() sobre filas crudas vs sobre las celdas del cubo (resultados idénticos), más el corte
+neto pospago por operadora. Camino real de update_cube sobre un Excel sintético (--excel-rows):
+primera construcción, Excel con un mes nuevo y Excel sin cambios. También un chequeo ante una
+revisión que mueve líneas entre operadoras sin cambiar los totales del mes.
+
+    python -m bench.bench_eda_cube --rows 3000000 --excel-rows 50000
+"""
+import time, argparse, tempfile
+from pathlib import Path
+import pandas as pd
+from bench.synth_punku import synthetic_df, write_excel
+from bench.bench_eda_aggregate import _same
+from eda import portabilidad as P
+from eda.portabilidad import BRAND_MAP, aggregate, _compact
+from eda.cube import Cube, net_by_operator, update_cube
+
+def _t(fn):
+    t0 = time.perf_counter(); out = fn(); return time.perf_counter()-t0, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=3_000_000)
+    ap.add_argument("--excel-rows", type=int, default=50_000)
+    args = ap.parse_args()
+    raw = synthetic_df(args.rows)
+    raw["Cedente_b"] = raw["Cedente"].map(BRAND_MAP).fillna(raw["Cedente"])
+    raw["Receptor_b"] = raw["Receptor"].map(BRAND_MAP).fillna(raw["Receptor"])
+    df = _compact(raw)
+    target = pd.Timestamp("2025-01-01")
+
+    t_full, full = _t(lambda: Cube.from_frame(df))
+    print(f"{args.rows:,} filas -> {len(full):,} celdas "
+          f"({full.lines.nbytes + full.rows.nbytes + full.date.nbytes + 4*len(full)*2:,} bytes)")
+    print(f"Cube.from_frame          {t_full*1000:8.1f} ms")
+    t_raw, a = _t(lambda: aggregate(df, target))
+    cf = full.frame()
+    t_cube, b = _t(lambda: aggregate(cf, target))
+    print(f"aggregate filas crudas   {t_raw*1000:8.1f} ms")
+    print(f"aggregate sobre el cubo  {t_cube*1000:8.1f} ms  x{t_raw/t_cube:.0f}  idéntico: {_same(a, b)}")
+    t_pos, pos = _t(lambda: net_by_operator(full, "Postpago"))
+    print(f"neto pospago por operadora {t_pos*1000:6.1f} ms; últimos 3 meses:")
+    print(pos.tail(3).astype(int).to_string())
+    bench_update(args.excel_rows)
+    check_same_totals_revision()
+
+def bench_update(rows: int):
+    """update_cube sobre un Excel real (incluye sha256 + caché Parquet cuando el archivo cambia)."""
+    tmp = Path(tempfile.mkdtemp(prefix="bench_cube_upd_"))
+    P.EDA_CACHE_DIR = tmp/"cache"
+    xlsx, cube_path = tmp/"punku.xlsx", tmp/"cube.npz"
+    raw = synthetic_df(rows)
+    last = raw["Mes"].max()
+    write_excel(raw[raw["Mes"] < last], xlsx)
+    t_first, _ = _t(lambda: update_cube(str(xlsx), cube_path))
+    write_excel(raw, xlsx)
+    t_new, cube = _t(lambda: update_cube(str(xlsx), cube_path))
+    changed = cube.meta["changed_dates"]
+    t_same, _ = _t(lambda: update_cube(str(xlsx), cube_path))
+    t_rows, _ = _t(lambda: P.load_excel(str(xlsx), columns=P.EDA_COLUMNS))
+    print(f"update_cube ({rows:,} filas en Excel):")
+    print(f"  primera construcción   {t_first*1000:8.1f} ms")
+    print(f"  Excel con mes nuevo    {t_new*1000:8.1f} ms  (fechas cambiadas: {changed})")
+    print(f"  Excel sin cambios      {t_same*1000:8.1f} ms  (filas desde Parquet: {t_rows*1000:.1f} ms)")
+
+def check_same_totals_revision(rows: int = 5000) -> bool:
+    """Cambia el Receptor de una fila del último mes (totales por fecha iguales): el cubo debe seguir a las filas."""
+    tmp = Path(tempfile.mkdtemp(prefix="bench_cube_rev_"))
+    P.EDA_CACHE_DIR = tmp/"cache"
+    xlsx, cube_path = tmp/"punku.xlsx", tmp/"cube.npz"
+    raw = synthetic_df(rows, start="2024-01-01")
+    write_excel(raw, xlsx)
+    update_cube(str(xlsx), cube_path)
+    last = raw["Mes"].max()
+    i = raw.index[(raw["Mes"] == last) & (raw["Receptor"] != "Entel Perú S.A.")
+                  & (raw["Cedente"] != "Entel Perú S.A.")][0]
+    raw.loc[i, "Receptor"] = "Entel Perú S.A."
+    write_excel(raw, xlsx)
+    cube = update_cube(str(xlsx), cube_path)
+    filas = P.load_excel(str(xlsx), columns=P.EDA_COLUMNS)
+    ok = _same(aggregate(cube.frame(), last), aggregate(filas, last))
+    print(f"revisión con mismos totales: fechas cambiadas {cube.meta['changed_dates']}, "
+          f"cubo == filas: {ok}")
+    return ok
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# bench/bench_eda_range.py
+"""
+Backfill de N meses: build_eda(path, mes) en un loop (sin y con caché Parquet) vs
+build_eda_range (una lectura, una agregación, escritura en paralelo). Verifica que los JSON
+sean idénticos.
+
+    python -m bench.bench_eda_range --rows 20000 --months 12
+"""
+import time, argparse, tempfile
+from pathlib import Path
+import pandas as pd
+from bench.synth_punku import synthetic_df, write_excel
+from eda import portabilidad as P, cube as C
+
+def _loop(xlsx, targets, outdir):
+    return [P.build_eda(xlsx, str(t.date()), outdir) for t in targets]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--months", type=int, default=12)
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+    tmp = Path(tempfile.mkdtemp(prefix="bench_range_"))
+    xlsx = str(tmp/"punku.xlsx")
+    write_excel(synthetic_df(args.rows), xlsx)
+    P.EDA_CACHE_DIR = tmp/"cache"
+    C.CUBE_DIR = tmp/"cubes"              # no tocar los cubos reales de data/eda
+    end = pd.Timestamp("2025-06-01")
+    targets = list(pd.date_range(end - pd.DateOffset(months=args.months-1), end, freq="MS"))
+    print(f"{args.rows:,} filas, {len(targets)} meses ({targets[0].date()} .. {end.date()})")
+
+    P.EDA_CACHE = False
+    t0 = time.perf_counter(); _loop(xlsx, targets, tmp/"loop_excel"); t_xl = time.perf_counter()-t0
+    P.EDA_CACHE = True
+    P.parquet_cache(xlsx)   # conversión fuera de la medición
+    t0 = time.perf_counter(); a = _loop(xlsx, targets, tmp/"loop_pq"); t_loop = time.perf_counter()-t0
+    t0 = time.perf_counter()
+    b = P.build_eda_range(xlsx, str(targets[0].date()), str(end.date()), tmp/"range", args.workers)
+    t_range = time.perf_counter()-t0
+    same = [x.read_bytes() for x in a] == [x.read_bytes() for x in b]
+    print(f"loop build_eda (Excel)    {t_xl:8.2f} s")
+    print(f"loop build_eda (Parquet)  {t_loop:8.2f} s  x{t_xl/t_loop:.0f}")
+    print(f"build_eda_range           {t_range:8.2f} s  x{t_xl/t_range:.0f} (x{t_loop/t_range:.1f} vs loop Parquet)"
+          f"  idéntico: {same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# bench/bench_excel_cache.py
+"""
+load_excel: parseo del Excel (comportamiento anterior) vs caché Parquet (primera conversión y
+lecturas siguientes, completas y solo con las columnas de build_eda). Verifica que build_eda
+produzca el mismo JSON con y sin caché.
+
+    python -m bench.bench_excel_cache --rows 50000
+"""
+import time, argparse, tempfile
+from pathlib import Path
+from bench.synth_punku import synthetic_df, write_excel
+from eda import portabilidad as P, cube as C
+
+def _t(fn, repeat=1):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); out = fn(); best = min(best, time.perf_counter()-t0)
+    return best, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=50_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    tmp = Path(tempfile.mkdtemp(prefix="bench_excel_"))
+    xlsx = tmp/"punku.xlsx"
+    write_excel(synthetic_df(args.rows), xlsx)
+    P.EDA_CACHE_DIR = tmp/"cache"
+    C.CUBE_DIR = tmp/"cubes"              # no tocar los cubos reales de data/eda
+    print(f"Excel sintético: {args.rows:,} filas, {xlsx.stat().st_size/2**20:.1f} MB")
+
+    t_xl, df_xl = _t(lambda: P._read_excel(str(xlsx)))
+    t_conv, pq = _t(lambda: P.parquet_cache(str(xlsx)))
+    t_full, df_pq = _t(lambda: P.load_excel(str(xlsx)), args.repeat)
+    t_cols, _ = _t(lambda: P.load_excel(str(xlsx), columns=P.EDA_COLUMNS), args.repeat)
+    mem = lambda d: d.memory_usage(deep=True).sum()/2**20
+    print(f"read_excel                {t_xl*1000:9.1f} ms  ({mem(df_xl):.1f} MB en memoria)")
+    print(f"conversión a Parquet      {t_conv*1000:9.1f} ms  (incluye read_excel; {pq.stat().st_size/2**20:.2f} MB)")
+    print(f"Parquet, todas columnas   {t_full*1000:9.1f} ms  ({mem(df_pq):.1f} MB)  x{t_xl/t_full:.0f}")
+    print(f"Parquet, EDA_COLUMNS      {t_cols*1000:9.1f} ms  x{t_xl/t_cols:.0f}")
+
+    a = Path(P.build_eda(str(xlsx), outdir=tmp/"con")).read_text(encoding="utf-8")
+    P.EDA_CACHE = False
+    b = Path(P.build_eda(str(xlsx), outdir=tmp/"sin")).read_text(encoding="utf-8")
+    print("build_eda idéntico con/sin caché:", a == b)
+
+if __name__ == "__main__":
+    main()
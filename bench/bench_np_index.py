@@ -0,0 +1,64 @@
+# bench/bench_np_index.py
+"""
+Qdrant (modo local) vs índice NumPy (rag/np_index) sobre los mismos datos sintéticos:
+tiempo de arranque (abrir store / cargar índice) y latencia de consulta, con y sin filtro.
+Verifica además que el top-k coincida.
+
+    python -m bench.bench_np_index --points 3000 --n 100
+"""
+import os, time, argparse, tempfile, statistics
+os.environ.setdefault("EMBED_BACKEND", "hashing")
+import numpy as np
+from qdrant_client.models import PointStruct
+from rag.embed_client import index_meta
+from rag.qdrant_init import ensure_collection, close_client, get_client
+from rag import np_index
+from rag.retrieve import _search
+
+def _ms(xs): return statistics.median(xs)*1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--points", type=int, default=2000)
+    ap.add_argument("--dim", type=int, default=1024)
+    ap.add_argument("--n", type=int, default=50)
+    ap.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    args = ap.parse_args()
+    os.environ.pop("QDRANT_URL", None)
+    os.environ["QDRANT_LOCAL_PATH"] = tempfile.mkdtemp(prefix="bench_np_q_")
+    np_index.INDEX_DIR = np_index.Path(tempfile.mkdtemp(prefix="bench_np_i_"))
+
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((args.points, args.dim)).astype(np.float32)
+    coll = "bench_np"
+    c = ensure_collection(coll, dim=args.dim, index_meta={**index_meta(), "dim": args.dim})
+    for i in range(0, args.points, 512):
+        c.upsert(coll, points=[PointStruct(id=j, vector=X[j].tolist(), payload={
+            "text": f"chunk {j} " + "x"*800, "url": f"https://osiptel/{j//4}", "date": f"{2015+j%10}-{j%12+1:02d}-01",
+            "period": "", "period_type": "mensual" if j % 5 else "anual"}) for j in range(i, min(i+512, args.points))])
+    np_index.export_collection(coll, dtype=args.dtype)
+    close_client()
+
+    Q = [rng.standard_normal(args.dim).astype(np.float32).tolist() for _ in range(args.n)]
+    flt = dict(period_type="mensual", date_from="2023-01-01", date_to="2024-12-01")
+
+    t0 = time.perf_counter(); cl = get_client(); cl.count(coll); q_start = time.perf_counter()-t0
+    t0 = time.perf_counter(); idx = np_index.load_index(coll); idx.column("url"); n_start = time.perf_counter()-t0
+    print(f"arranque   qdrant local {q_start*1000:9.1f} ms | numpy {n_start*1000:9.1f} ms")
+
+    for name, kw in (("sin filtro", {}), ("con filtro", flt)):
+        ql, nl, same = [], [], 0
+        for v in Q:
+            t0 = time.perf_counter()
+            a = _search(cl, v, 4, coll, kw.get("period_type"), 600, kw.get("date_from"), kw.get("date_to"))
+            ql.append(time.perf_counter()-t0)
+            t0 = time.perf_counter()
+            b = idx.rows(idx.query(v, 4, **kw), 600)
+            nl.append(time.perf_counter()-t0)
+            same += [r["text"] for r in a] == [r["text"] for r in b]
+        print(f"{name:<10} qdrant p50 {_ms(ql):7.2f} ms | numpy p50 {_ms(nl):7.2f} ms  "
+              f"x{_ms(ql)/_ms(nl):.1f}  top-k idéntico {same}/{len(Q)}")
+    close_client()
+
+if __name__ == "__main__":
+    main()
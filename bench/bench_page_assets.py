@@ -0,0 +1,78 @@
+# bench/bench_page_assets.py
+"""
+Peso de página por modo de assets de build_page (cdn | inline | shared): bytes del HTML, bytes
+locales de la primera carga, requests externos y costo por página para un archivo de N meses.
+Con playwright instalado mide además el tiempo de render (FCP / load) en Chromium headless.
+
+    CHARTJS_PATH=chart.umd.min.js python -m bench.bench_page_assets --pages 24
+
+En modo cdn el navegador además baja y ejecuta el JIT de Tailwind y Chart.js desde internet
+(no incluidos en los bytes locales).
+"""
+import re, json, argparse, tempfile
+from pathlib import Path
+import build_page as B
+from eda.artifact import write_artifact
+from utils.page_assets import purge_css, used_classes
+from bench.bench_eda_artifact import synthetic_eda
+from bench.bench_render import NARR
+
+def _external(html):
+    return re.findall(r"""(?:src|href)=["'](https?://[^"']+)""", html)
+
+def _local_bytes(html, outdir):
+    refs = re.findall(r"""(?:src|href)=["'](assets/[^"']+)""", html)
+    return sum((Path(outdir)/r).stat().st_size for r in refs), refs
+
+def _render_times(path):
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        return None
+    with sync_playwright() as p:
+        b = p.chromium.launch()
+        page = b.new_page()
+        page.goto(Path(path).resolve().as_uri(), wait_until="load")
+        t = page.evaluate("""() => {
+            const fcp = performance.getEntriesByName('first-contentful-paint')[0];
+            const nav = performance.getEntriesByType('navigation')[0];
+            return [fcp ? fcp.startTime : null, nav.loadEventEnd];
+        }""")
+        b.close()
+    return t
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=24)
+    args = ap.parse_args()
+    tmp = Path(tempfile.mkdtemp(prefix="bench_assets_"))
+    paths = []
+    for i in range(args.pages):
+        e = synthetic_eda(132, seed=i)
+        p = tmp/"eda"/f"eda_{i:03d}.json"; p.parent.mkdir(exist_ok=True)
+        p.write_text(json.dumps(e, ensure_ascii=False), encoding="utf-8"); write_artifact(e, p.with_suffix(".bin"))
+        paths.append(p)
+
+    body = B.render_html(json.loads(paths[0].read_text(encoding="utf-8")), NARR, "cdn")
+    css, unknown = purge_css(used_classes(body))
+    unknown = [c for c in unknown if c not in ("slide", "card")]     # definidas en el <style> de la página
+    print(f"CSS purgado: {len(css):,} B para {len(used_classes(body))} clases (sin regla: {unknown or 'ninguna'})")
+
+    print(f"{'modo':<8} {'HTML':>9} {'1ª carga local':>15} {'externos':>9} {f'{args.pages} páginas':>14}  render (FCP/load ms)")
+    for mode in ("cdn", "inline", "shared"):
+        outdir = tmp/mode
+        try:
+            outs = [B.write_page(p, NARR, outdir, mode) for p in paths]
+        except (RuntimeError, FileNotFoundError) as e:
+            print(f"{mode:<8} omitido: {e}")
+            continue
+        html = outs[0].read_text(encoding="utf-8")
+        local, refs = _local_bytes(html, outdir)
+        total = sum(o.stat().st_size for o in outs) + local          # assets compartidos se bajan una vez
+        t = _render_times(outs[0])
+        tt = f"{t[0]:.0f} / {t[1]:.0f}" if t and t[0] is not None else "sin navegador (pip install playwright)"
+        print(f"{mode:<8} {outs[0].stat().st_size:>8,}B {outs[0].stat().st_size+local:>14,}B {len(_external(html)):>9} "
+              f"{total:>13,}B  {tt}")
+
+if __name__ == "__main__":
+    main()
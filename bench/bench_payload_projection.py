@@ -0,0 +1,77 @@
+# bench/bench_payload_projection.py
+"""
+Payload completo (with_payload=True, comportamiento anterior de retrieve/_get_by_date) vs
+proyección al snippet precalculado (with_payload=["snippet","url","date"]): bytes de payload
+por consulta (JSON) y latencia de búsqueda y scroll por fecha.
+
+    python -m bench.bench_payload_projection --points 3000 --n 100 [--url http://localhost:6333]
+
+En modo local no hay transferencia por red; con --url la diferencia incluye red y deserialización.
+"""
+import os, json, time, argparse, tempfile, statistics, warnings
+os.environ.setdefault("EMBED_BACKEND", "hashing")
+import numpy as np
+from qdrant_client.models import PointStruct
+from rag.qdrant_init import ensure_collection, close_client, write_index_meta, SNIPPET_CHARS
+from rag.retrieve import _filter, _projection
+
+def _ms(xs): return statistics.median(xs)*1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--points", type=int, default=2000)
+    ap.add_argument("--dim", type=int, default=256)
+    ap.add_argument("--n", type=int, default=50)
+    ap.add_argument("--k", type=int, default=4)
+    ap.add_argument("--max-chars", type=int, default=600)
+    ap.add_argument("--url", default=None, help="Servidor Qdrant (recomendado para medir)")
+    args = ap.parse_args()
+    if args.url:
+        os.environ["QDRANT_URL"] = args.url; os.environ.pop("QDRANT_LOCAL_PATH", None)
+    else:
+        os.environ.pop("QDRANT_URL", None)
+        os.environ["QDRANT_LOCAL_PATH"] = tempfile.mkdtemp(prefix="bench_proj_")
+        warnings.filterwarnings("ignore", message="Payload indexes have no effect")
+
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((args.points, args.dim)).astype(np.float32)
+    coll = "bench_proj"
+    c = ensure_collection(coll, dim=args.dim, index_meta={"backend": "bench", "dim": args.dim})
+    if c.count(coll).count == 0:
+        for i in range(0, args.points, 512):
+            pts = []
+            for j in range(i, min(i+512, args.points)):
+                text = f"chunk {j} portabilidad " + "x"*(700 + j % 200)
+                pts.append(PointStruct(id=j, vector=X[j].tolist(), payload={
+                    "text": text, "snippet": text[:SNIPPET_CHARS], "url": f"https://osiptel/{j//4}",
+                    "date": f"{2015+j%10}-{j%12+1:02d}-01", "period": "", "period_type": "mensual",
+                    "indexed_at": "2025-01-01", "doc_hash": "0"*64}))
+            c.upsert(coll, points=pts, wait=True)
+        write_index_meta(c, coll, {"snippet_chars": SNIPPET_CHARS})   # como rag.ingest_osiptel
+
+    Q = [rng.standard_normal(args.dim).astype(np.float32).tolist() for _ in range(args.n)]
+    dates = [f"{2015+i%10}-{i%12+1:02d}-01" for i in range(args.n)]
+    modes = {"payload completo": True, "proyección": _projection(c, coll, args.max_chars)}
+    print(f"max_chars={args.max_chars} SNIPPET_CHARS={SNIPPET_CHARS} proyección={modes['proyección']}")
+    for op in ("query_points", "scroll por fecha"):
+        base = None
+        for name, wp in modes.items():
+            lat, nbytes = [], 0
+            for v, d in zip(Q, dates):
+                t0 = time.perf_counter()
+                if op == "query_points":
+                    pts = c.query_points(coll, query=v, limit=args.k, with_payload=wp).points
+                else:
+                    pts, _ = c.scroll(coll, scroll_filter=_filter(date=d), limit=args.k, with_payload=wp)
+                lat.append(time.perf_counter()-t0)
+                nbytes += sum(len(json.dumps(p.payload, ensure_ascii=False).encode()) for p in pts)
+            per_q = nbytes/len(Q)
+            extra = f"  bytes x{base[0]/per_q:.1f}  tiempo x{base[1]/_ms(lat):.2f}" if base else ""
+            base = base or (per_q, _ms(lat))
+            print(f"{op:<17} {name:<17} {per_q:9,.0f} B/consulta  p50 {_ms(lat):7.2f} ms{extra}")
+    if not args.url:
+        c.delete_collection(coll)
+    close_client()
+
+if __name__ == "__main__":
+    main()
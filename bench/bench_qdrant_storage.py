@@ -0,0 +1,83 @@
+# bench/bench_qdrant_storage.py
+"""
+RAM estimada por punto y latencia de búsqueda para distintas opciones de almacenamiento
+de ensure_collection (float32 plano, int8, binary, on-disk), con vectores sintéticos.
+
+    python -m bench.bench_qdrant_storage --points 20000 --url http://localhost:6333
+
+En modo local (sin --url) qdrant-client ignora cuantización/HNSW/on-disk: la latencia no
+cambiará entre configuraciones; usar un servidor para medir el efecto real.
+"""
+import os, time, argparse, tempfile, warnings
+import numpy as np
+from qdrant_client.models import PointStruct, SearchParams
+from rag.qdrant_init import ensure_collection, search_params
+
+CONFIGS = {
+    "float32":        dict(quantization="none"),
+    "int8":           dict(quantization="int8"),
+    "binary":         dict(quantization="binary"),
+    "int8+on_disk":   dict(quantization="int8", on_disk=True, on_disk_payload=True),
+    "binary+on_disk": dict(quantization="binary", on_disk=True, on_disk_payload=True),
+}
+
+def ram_per_point(dim: int, payload_bytes: int, quantization="none", on_disk=False,
+                  on_disk_payload=False, hnsw_m=16) -> int:
+    """Bytes residentes por punto: originales (si no on_disk) + cuantizados + grafo HNSW + payload."""
+    b = 0 if on_disk else dim*4
+    b += {"none": 0, "int8": dim, "binary": dim//8}[quantization]
+    b += hnsw_m*2*4                      # enlaces de la capa 0 (ids u32)
+    b += 0 if on_disk_payload else payload_bytes
+    return b
+
+def _pct(xs, p): return float(np.percentile(xs, p))*1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--points", type=int, default=5000)
+    ap.add_argument("--dim", type=int, default=1024)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=4)
+    ap.add_argument("--url", default=None, help="Servidor Qdrant (recomendado para medir)")
+    args = ap.parse_args()
+
+    if args.url:
+        os.environ["QDRANT_URL"] = args.url; os.environ.pop("QDRANT_LOCAL_PATH", None)
+    else:
+        os.environ["QDRANT_LOCAL_PATH"] = tempfile.mkdtemp(prefix="bench_qdrant_")
+        warnings.filterwarnings("ignore", message="Local mode performs exact")
+
+    rng = np.random.default_rng(0)
+    X = rng.standard_normal((args.points, args.dim)).astype(np.float32)
+    X /= np.linalg.norm(X, axis=1, keepdims=True)
+    Q = X[rng.integers(0, args.points, args.queries)] + 0.05*rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    payload = {"text": "x"*900, "url": "https://www.osiptel.gob.pe/...", "date": "2024-01-01",
+               "period": "ene_2024", "period_type": "mensual"}
+    pbytes = sum(len(str(k))+len(str(v)) for k, v in payload.items())
+
+    print(f"{'config':<16} {'RAM/punto':>10} {'RAM total':>10} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9}")
+    truth = None
+    for name, cfg in CONFIGS.items():
+        coll = f"bench_{name.replace('+','_')}"
+        c = ensure_collection(coll, dim=args.dim, **cfg)
+        if c.count(coll).count == 0:
+            for i in range(0, args.points, 512):
+                c.upsert(coll, points=[PointStruct(id=j, vector=X[j].tolist(), payload=payload)
+                                       for j in range(i, min(i+512, args.points))], wait=True)
+        if truth is None:
+            truth = [{p.id for p in c.query_points(coll, query=q.tolist(), limit=args.k,
+                                                   search_params=SearchParams(exact=True)).points} for q in Q]
+        lat, hit = [], 0
+        sp = search_params()
+        for q, t in zip(Q, truth):
+            t0 = time.perf_counter()
+            got = c.query_points(coll, query=q.tolist(), limit=args.k, search_params=sp).points
+            lat.append(time.perf_counter()-t0)
+            hit += len(t & {p.id for p in got})
+        rpp = ram_per_point(args.dim, pbytes, **{k: v for k, v in cfg.items()})
+        print(f"{name:<16} {rpp:>9,}B {rpp*args.points/2**20:>8.1f}MB {_pct(lat,50):>8.2f} {_pct(lat,95):>8.2f} "
+              f"{hit/(args.k*len(Q)):>9.3f}")
+        c.delete_collection(coll)      # c es el cliente compartido del proceso: no cerrarlo
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# bench/bench_render.py
+"""
+Renders/seg de build_page: plantilla precompilada (render_html) desde el dict en memoria y
+render_many desde disco (JSON vs .bin columnar), más el costo del formateo de etiquetas con
+pandas por elemento (camino anterior) vs axis_label/_date.
+
+    python -m bench.bench_render --pages 24 --n 500
+"""
+import json, time, argparse, tempfile
+from pathlib import Path
+import build_page as B
+from eda.artifact import write_artifact, month_iso
+from bench.bench_eda_artifact import synthetic_eda
+
+NARR = {"title": "Portabilidad móvil", "subhead": "Resumen del mes", "bullets": ["uno", "dos", "tres"],
+        "paragraph": "Texto.", "flags": {"bar_months": 16}}
+
+def _rate(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n): fn()
+    return n/(time.perf_counter()-t0)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=24)
+    ap.add_argument("--months", type=int, default=132)
+    ap.add_argument("--n", type=int, default=500)
+    args = ap.parse_args()
+    tmp = Path(tempfile.mkdtemp(prefix="bench_render_"))
+    eda = synthetic_eda(args.months)
+    print(f"render_html (dict en memoria)   {_rate(lambda: B.render_html(eda, NARR), args.n):9.0f} páginas/s")
+
+    js_dir, bin_dir = tmp/"json", tmp/"bin"
+    js_dir.mkdir(); bin_dir.mkdir()
+    paths_js, paths_bin = [], []
+    for i in range(args.pages):
+        e = synthetic_eda(args.months, seed=i)
+        for d, acc in ((js_dir, paths_js), (bin_dir, paths_bin)):
+            p = d/f"eda_{i:03d}.json"
+            p.write_text(json.dumps(e, ensure_ascii=False, indent=2), encoding="utf-8"); acc.append(p)
+        write_artifact(e, paths_bin[-1].with_suffix(".bin"))
+    for name, paths in (("JSON", paths_js), (".bin", paths_bin)):
+        t0 = time.perf_counter()
+        reps = max(1, args.n // args.pages)
+        for _ in range(reps):
+            B.render_many([(p, NARR) for p in paths], outdir=tmp/"out")
+        rate = reps*len(paths)/(time.perf_counter()-t0)
+        print(f"render_many desde disco ({name:<5}) {rate:9.0f} páginas/s  (lee + renderiza + escribe)")
+
+    isos = [month_iso(m) for m in range(2024*12, 2024*12+16)]
+    try:
+        import pandas as pd
+        old = _rate(lambda: [pd.to_datetime(x).strftime("%b-%y").title() for x in isos], args.n)
+        print(f"16 etiquetas con pandas         {old:9.0f} veces/s")
+    except ImportError:
+        pass
+    B.axis_label.cache_clear()
+    new = _rate(lambda: [B.axis_label(x) for x in isos], args.n)
+    print(f"16 etiquetas con axis_label     {new:9.0f} veces/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# bench/bench_svg_charts.py
+"""
+Gráficos de build_page: Chart.js en el navegador (charts=js) vs SVG prerenderado (charts=svg).
+Peso del HTML por modo de assets, scripts que quedan en la página, renders/seg en build time y,
+con playwright instalado, FCP / load en Chromium headless (modo inline).
+
+    CHARTJS_PATH=chart.umd.min.js python -m bench.bench_svg_charts --n 200
+"""
+import re, time, argparse, tempfile
+from pathlib import Path
+import build_page as B
+from bench.bench_eda_artifact import synthetic_eda
+from bench.bench_render import NARR
+
+def _render_times(path):
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        return None
+    with sync_playwright() as p:
+        b = p.chromium.launch()
+        page = b.new_page()
+        page.goto(Path(path).resolve().as_uri(), wait_until="load")
+        t = page.evaluate("""() => {
+            const fcp = performance.getEntriesByName('first-contentful-paint')[0];
+            const nav = performance.getEntriesByType('navigation')[0];
+            return [fcp ? fcp.startTime : null, nav.loadEventEnd];
+        }""")
+        b.close()
+    return t
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--months", type=int, default=132)
+    ap.add_argument("--n", type=int, default=200)
+    args = ap.parse_args()
+    tmp = Path(tempfile.mkdtemp(prefix="bench_svg_"))
+    eda = synthetic_eda(args.months)
+
+    for charts in ("js", "svg"):
+        t0 = time.perf_counter()
+        for _ in range(args.n): B.render_html(eda, NARR, "cdn", charts=charts)
+        print(f"render_html charts={charts:<3} {args.n/(time.perf_counter()-t0):8.0f} páginas/s")
+
+    print(f"{'charts':<6} {'assets':<7} {'HTML':>9} {'<script>':>9}  render (FCP/load ms)")
+    for charts in ("js", "svg"):
+        for assets in ("cdn", "inline"):
+            try:
+                html = B.render_html(eda, NARR, assets, charts=charts)
+            except (RuntimeError, FileNotFoundError) as e:
+                print(f"{charts:<6} {assets:<7} omitido: {e}")
+                continue
+            out = tmp/f"{charts}_{assets}.html"
+            out.write_text(html, encoding="utf-8")
+            t = _render_times(out) if assets == "inline" else None
+            tt = f"{t[0]:.0f} / {t[1]:.0f}" if t and t[0] is not None else "-"
+            print(f"{charts:<6} {assets:<7} {len(html.encode()):>8,}B {len(re.findall(r'<script', html)):>9}  {tt}")
+    print("svg + inline: la página se ve completa con JS deshabilitado (correo, kioscos).")
+
+if __name__ == "__main__":
+    main()
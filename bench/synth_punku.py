@@ -0,0 +1,31 @@
+# bench/synth_punku.py
+"""
+Datos sintéticos con la forma del Excel Punku (8.1 Portabilidad móvil, hoja Dataset) para los
+benchmarks de eda/: mismas columnas, razones sociales reales + otras, prepago/pospago.
+"""
+import numpy as np, pandas as pd
+from eda.portabilidad import BRAND_MAP
+
+EMPRESAS = list(BRAND_MAP) + ["Guinea Mobile S.A.C.", "Olo del Perú S.A.C.", "Dolphin Mobile S.A.C."]
+MODS = ["Prepago", "Postpago"]
+
+def synthetic_df(rows: int = 50_000, start: str = "2014-07-01", end: str = "2025-06-01", seed: int = 0):
+    """DataFrame crudo (columnas ya renombradas como en load_excel, sin marcas)."""
+    rng = np.random.default_rng(seed)
+    meses = pd.date_range(start, end, freq="MS")
+    ced = rng.integers(0, len(EMPRESAS), rows)
+    rec = (ced + rng.integers(1, len(EMPRESAS), rows)) % len(EMPRESAS)   # cedente != receptor
+    return pd.DataFrame({
+        "Cedente": np.asarray(EMPRESAS, dtype=object)[ced],
+        "Receptor": np.asarray(EMPRESAS, dtype=object)[rec],
+        "Mod_Cedente": np.asarray(MODS, dtype=object)[rng.integers(0, 2, rows)],
+        "Mod_Receptor": np.asarray(MODS, dtype=object)[rng.integers(0, 2, rows)],
+        "Mes": meses[np.sort(rng.integers(0, len(meses), rows))],
+        "Lineas": rng.integers(1, 400, rows),
+    })
+
+def write_excel(df: pd.DataFrame, path) -> None:
+    """Escribe con el layout del original: 3 filas de título, encabezado en la fila 4, datos en B:G."""
+    with pd.ExcelWriter(path, engine="openpyxl") as xw:
+        pd.DataFrame([["8.1. PORTABILIDAD MÓVIL"]]).to_excel(xw, sheet_name="Dataset", header=False, index=False)
+        df.to_excel(xw, sheet_name="Dataset", startrow=3, startcol=1, index=False)
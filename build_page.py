@@ -1,173 +1,315 @@
 # build_page.py
-import json, pandas as pd
+import os, re, json, hashlib, calendar, warnings, datetime as dt
+from functools import lru_cache
 from pathlib import Path
+from eda.artifact import EdaArtifact, load_eda, month_int
+from utils.page_assets import used_classes, purge_css, chartjs_source, shared_asset, CHARTJS_URL
+from utils import svg_charts, page_assets
 
 MESES_ABR = ["Ene","Feb","Mar","Abr","May","Jun","Jul","Ago","Sep","Oct","Nov","Dic"]
 MESES_FULL = ["Enero","Febrero","Marzo","Abril","Mayo","Junio","Julio","Agosto","Septiembre","Octubre","Noviembre","Diciembre"]
+MON_EN = ["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"]   # etiquetas de ejes: "%b-%y" (locale C)
 
-def mes_abr(ts: pd.Timestamp) -> str:
+def _date(x) -> dt.date:
+    """'YYYY-MM-DD...' (o date/Timestamp) -> date, sin pandas."""
+    return x if isinstance(x, dt.date) else dt.date.fromisoformat(str(x)[:10])
+
+def mes_abr(ts) -> str:
     return f"{MESES_ABR[ts.month-1]}’{str(ts.year)[2:]}"
 
-def mes_full(ts: pd.Timestamp) -> str:
+def mes_full(ts) -> str:
     return f"{MESES_FULL[ts.month-1]} {ts.year}"
 
+@lru_cache(maxsize=4096)
+def axis_label(iso: str) -> str:
+    """'2025-01-01' -> 'Jan-25' (equivale a strftime('%b-%y').title())."""
+    return f"{MON_EN[int(iso[5:7])-1]}-{iso[2:4]}"
+
+def _minus_months(d: dt.date, k: int) -> dt.date:
+    """d - k meses con el día acotado al fin de mes (como pd.DateOffset(months=k))."""
+    y, m = divmod(d.year*12 + d.month-1 - k, 12)
+    return d.replace(year=y, month=m+1, day=min(d.day, calendar.monthrange(y, m+1)[1]))
+
 def range_title_from_labels(label_dates: list[str]) -> str:
     """Recibe fechas 'YYYY-MM-DD' o ya strings tipo '2025-01-01'; devuelve 'Oct’23 a Ene’25'."""
-    dts = [pd.to_datetime(x) for x in label_dates]
+    dts = [_date(x) for x in label_dates]
     return f"{mes_abr(min(dts))} a {mes_abr(max(dts))}"
 
 def last_n_months_from_monthly_total(eda, n: int):
-    series = sorted(eda["monthly_total"], key=lambda x: x["period"])
     n = max(6, min(int(n), 24))  # 6..24 meses
-    series = series[-n:]
-    labels_dates = [s["period"] for s in series]                    # para el título
-    labels = [pd.to_datetime(s["period"]).strftime("%b-%y").title() for s in series]
-    values = [int(s["lines"]) for s in series]
+    if isinstance(eda, EdaArtifact):                                # solo la ventana, vía memmap
+        labels_dates, values = eda.monthly_window(n)
+    else:
+        series = sorted(eda["monthly_total"], key=lambda x: x["period"])[-n:]
+        labels_dates = [s["period"] for s in series]                # para el título
+        values = [int(s["lines"]) for s in series]
+    labels = [axis_label(d[:10]) for d in labels_dates]
     return labels, values, labels_dates
 
 def last_12m_neto_timeseries(eda):
-    latest = pd.to_datetime(eda["latest_period"])
-    cut = latest - pd.DateOffset(months=11)
-    idx = pd.to_datetime(eda["neto_timeseries"]["index"])
-    mask = idx >= cut
-    out = {
-        "index": [d.strftime("%b-%y").title() for d in idx[mask]],
-        "index_dates": [d.strftime("%Y-%m-%d") for d in idx[mask]]  # para título
-    }
-    for op in ("CLARO","ENTEL","BITEL","MOVISTAR"):
-        arr = pd.Series(eda["neto_timeseries"][op], index=idx)
-        out[op] = [int(x) for x in arr[mask].tolist()]
-    return out
+    latest = _date(eda["latest_period"])
+    cut = _minus_months(latest, 11)
+    ops = ("CLARO","ENTEL","BITEL","MOVISTAR")
+    if isinstance(eda, EdaArtifact):
+        # meses (día 1) >= cut  <=>  mes >= mes(cut), +1 si cut no cae en día 1
+        w = eda.neto_window(month_int(cut.isoformat()) + (cut.day > 1))
+        dates, vals = w["index"], {op: w[op] for op in ops}
+    else:
+        ts = eda["neto_timeseries"]
+        keep = [i for i, d in enumerate(ts["index"]) if _date(d) >= cut]
+        dates = [ts["index"][i] for i in keep]
+        vals = {op: [ts[op][i] for i in keep] for op in ops}
+    dates = [_date(d).isoformat() for d in dates]
+    return {"index": [axis_label(d) for d in dates],
+            "index_dates": dates,                                   # para título
+            **{op: [int(x) for x in vals[op]] for op in ops}}
 
-def render_html(eda:dict, narrative:dict):
-    # 1) Barras: ventana sugerida por el LLM (capada a 24)
-    bar_n = narrative.get("flags", {}).get("bar_months", 16)
-    bar_labels, bar_values, bar_label_dates = last_n_months_from_monthly_total(eda, bar_n)
-    bar_title_range = range_title_from_labels(bar_label_dates)
-    #bar_labels_js = json.dumps(bar_labels, ensure_ascii=False)
-    #bar_values_js = json.dumps(bar_values)
+class Template:
+    """Plantilla con campos {{nombre}}: se parte una sola vez en literales + campos."""
+    FIELD = re.compile(r"\{\{(\w+)\}\}")
 
-    # 2) Neto por operadora: SIEMPRE últimos 12 meses si hay datos suficientes
-    neto12 = last_12m_neto_timeseries(eda)
-    show_neto = len(neto12["index"]) >= 2  # dibuja si hay ≥2 puntos
-    neto_title_range = range_title_from_labels(neto12["index_dates"])
-
-    # 3) Título para la tabla (mes objetivo en español)
-    latest = pd.to_datetime(eda["latest_period"])
-    table_title = f"Resultado neto — {mes_full(latest)}"
-
-    # 4) Filas de la tabla (ya solo último mes)
-    ops_rows = "".join([
-        f"<tr><td class='font-semibold'>{op['name']}</td>"
-        f"<td>{op['won']:,}</td><td>{op['lost']:,}</td>"
-        f"<td class='{'text-green-700' if op['net']>=0 else 'text-red-600'} font-semibold'>{op['net']:,}</td></tr>"
-        for op in eda["operators_current"]
-    ])
+    def __init__(self, text: str):
+        parts = self.FIELD.split(text)
+        self.literals, self.fields = parts[0::2], parts[1::2]
 
-    # 5) Bloque opcional del neto (12m)
-    neto_block = ""
-    if show_neto:
-        neto_block = f"""
-        <div class="col-span-12 card mt-6">
-          <h3 class="font-semibold mb-2">Resultado neto por operadora ({neto_title_range})</h3>
-          <div class="h-80"><canvas id="netoChart"></canvas></div>
-          <p class="text-sm text-gray-500 mt-2"><small>Fuente: PUNKU-OSIPTEL (fecha de corte: {mes_full(latest)})</small></p>
-        </div>
-        """
-    bar_labels_js = json.dumps(bar_labels, ensure_ascii=False)
-    bar_values_js = json.dumps(bar_values)
-    neto_idx_js   = json.dumps(neto12["index"], ensure_ascii=False)
-    neto_ds_js    = json.dumps({
-        "CLARO":   neto12.get("CLARO", []),
-        "ENTEL":   neto12.get("ENTEL", []),
-        "BITEL":   neto12.get("BITEL", []),
-        "MOVISTAR":neto12.get("MOVISTAR", []),
-        })
+    def render(self, ctx: dict) -> str:
+        out = [self.literals[0]]
+        for name, lit in zip(self.fields, self.literals[1:]):
+            out.append(str(ctx[name])); out.append(lit)
+        return "".join(out)
 
-    # 6) HTML (solo cambio los títulos h3)
-    return f"""<!doctype html>
+PAGE_TEMPLATE = """<!doctype html>
 <html lang="es"><head>
 <meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1"/>
-<title>{narrative['title']}</title>
-<script src="https://cdn.tailwindcss.com"></script>
-<script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.min.js"></script>
-<style>.slide{{width:1280px;min-height:720px;margin:0 auto}}.card{{border:1px solid #e5e7eb;border-radius:14px;padding:20px}}</style>
+<title>{{title}}</title>
+{{head_assets}}
+<style>.slide{width:1280px;min-height:720px;margin:0 auto}.card{border:1px solid #e5e7eb;border-radius:14px;padding:20px}</style>
 </head><body class="text-gray-900">
 <div class="slide">
   <div class="bg-gray-800 text-white p-6">
-    <h1 class="text-2xl font-bold">{narrative['title']}</h1>
-    <p class="opacity-80">{narrative['subhead']}</p>
+    <h1 class="text-2xl font-bold">{{title}}</h1>
+    <p class="opacity-80">{{subhead}}</p>
   </div>
 
   <div class="grid grid-cols-12 gap-6 p-6">
     <div class="col-span-7 card">
-      <h3 class="font-semibold mb-2">Evolución de líneas móviles portadas ({bar_title_range})</h3>
-      <div class="h-80"><canvas id="barChart"></canvas></div>
-      <p class="text-sm text-gray-500 mt-2"><small>Fuente: PUNKU-OSIPTEL (fecha de corte: {mes_full(latest)})</small></p>
+      <h3 class="font-semibold mb-2">Evolución de líneas móviles portadas ({{bar_title_range}})</h3>
+      <div class="h-80">{{bar_chart}}</div>
+      <p class="text-sm text-gray-500 mt-2"><small>Fuente: PUNKU-OSIPTEL (fecha de corte: {{cutoff}})</small></p>
     </div>
 
     <div class="col-span-5 card">
       <ul class="list-disc pl-5 mb-3">
-        {"".join([f"<li>{b}</li>" for b in narrative.get('bullets',[])])}
+        {{bullets}}
       </ul>
-      <p>{narrative['paragraph']}</p>
+      <p>{{paragraph}}</p>
     </div>
 
     <div class="col-span-12 card">
-      <h3 class="font-semibold mb-2">{table_title}</h3>
+      <h3 class="font-semibold mb-2">{{table_title}}</h3>
       <div class="overflow-x-auto"><table class="min-w-full text-center">
         <thead><tr class="bg-gray-100"><th>Operadora</th><th>Ganadas</th><th>Perdidas</th><th>Neto</th></tr></thead>
-        <tbody>{ops_rows}</tbody></table></div>
+        <tbody>{{ops_rows}}</tbody></table></div>
     </div>
 
-    {neto_block}
+    {{neto_block}}
   </div>
 </div>
 
-<script>
-  window.addEventListener('DOMContentLoaded', () => {{
+{{chart_script}}</body></html>"""
+
+NETO_TEMPLATE = """
+        <div class="col-span-12 card mt-6">
+          <h3 class="font-semibold mb-2">Resultado neto por operadora ({{neto_title_range}})</h3>
+          <div class="h-80">{{neto_chart}}</div>
+          <p class="text-sm text-gray-500 mt-2"><small>Fuente: PUNKU-OSIPTEL (fecha de corte: {{cutoff}})</small></p>
+        </div>
+        """
+
+CHART_SCRIPT_TEMPLATE = """<script>
+  window.addEventListener('DOMContentLoaded', () => {
     const nf = new Intl.NumberFormat('es-PE');
 
     // --- BARRAS (ventana reciente, <=24m) ---
-    const labels = {bar_labels_js};
-    const values = {bar_values_js};
+    const labels = {{bar_labels_js}};
+    const values = {{bar_values_js}};
     const ctxBar = document.getElementById('barChart');
-    if (ctxBar) {{
-      new Chart(ctxBar.getContext('2d'), {{
+    if (ctxBar) {
+      new Chart(ctxBar.getContext('2d'), {
         type:'bar',
-        data:{{ labels, datasets:[{{ label:'Líneas portadas', data:values, borderWidth:0, backgroundColor:'#0076CE', barThickness:36 }}]}},
-        options:{{
+        data:{ labels, datasets:[{ label:'Líneas portadas', data:values, borderWidth:0, backgroundColor:'#0076CE', barThickness:36 }]},
+        options:{
           responsive:true, maintainAspectRatio:false,
-          plugins:{{ legend:{{display:false}}, tooltip:{{ callbacks:{{ label:(c)=> nf.format(c.parsed.y)+' líneas' }} }} }},
-          scales:{{ y:{{ beginAtZero:true, ticks:{{ callback:(v)=> nf.format(v) }} }}, x:{{ grid:{{ display:false }} }} }}
-        }}
-      }});
-    }}
+          plugins:{ legend:{display:false}, tooltip:{ callbacks:{ label:(c)=> nf.format(c.parsed.y)+' líneas' } } },
+          scales:{ y:{ beginAtZero:true, ticks:{ callback:(v)=> nf.format(v) } }, x:{ grid:{ display:false } } }
+        }
+      });
+    }
 
     // --- NETO (últimos 12m) ---
-    const idx = {neto_idx_js};
-    const ds  = {neto_ds_js};
+    const idx = {{neto_idx_js}};
+    const ds  = {{neto_ds_js}};
     const ctxNeto = document.getElementById('netoChart');
-    if (ctxNeto && idx.length >= 2) {{
-      new Chart(ctxNeto.getContext('2d'), {{
+    if (ctxNeto && idx.length >= 2) {
+      new Chart(ctxNeto.getContext('2d'), {
         type:'line',
-        data:{{ labels: idx, datasets:[
-          {{label:'CLARO', data: ds.CLARO, borderWidth:2}},
-          {{label:'ENTEL', data: ds.ENTEL, borderWidth:2}},
-          {{label:'BITEL', data: ds.BITEL, borderWidth:2}},
-          {{label:'MOVISTAR', data: ds.MOVISTAR, borderWidth:2}},
-        ]}},
-        options:{{ responsive:true, maintainAspectRatio:false }}
-      }});
-    }}
-  }});
+        data:{ labels: idx, datasets:[
+          {label:'CLARO', data: ds.CLARO, borderWidth:2},
+          {label:'ENTEL', data: ds.ENTEL, borderWidth:2},
+          {label:'BITEL', data: ds.BITEL, borderWidth:2},
+          {label:'MOVISTAR', data: ds.MOVISTAR, borderWidth:2},
+        ]},
+        options:{ responsive:true, maintainAspectRatio:false }
+      });
+    }
+  });
 </script>
-</body></html>"""
+"""
+
+PAGE, NETO_BLOCK, CHART_SCRIPT = Template(PAGE_TEMPLATE), Template(NETO_TEMPLATE), Template(CHART_SCRIPT_TEMPLATE)
 
-def write_page(eda_path, narrative, outdir="reports"):
-    eda = json.loads(Path(eda_path).read_text(encoding="utf-8"))
-    html = render_html(eda, narrative)
+# Assets de la página: "cdn" (Tailwind Play + Chart.js desde jsDelivr), "inline" (CSS purgado y
+# Chart.js local dentro del HTML: un solo archivo offline) o "shared" (assets/*.<hash>.css|js
+# junto a las páginas, compartidos y cacheables).
+PAGE_ASSETS = os.getenv("PAGE_ASSETS", "cdn")
+PAGE_CHARTS = os.getenv("PAGE_CHARTS", "js")      # js (Chart.js) | svg (prerenderado, sin JS)
+CDN_HEAD = f"""<script src="https://cdn.tailwindcss.com"></script>
+<script src="{CHARTJS_URL}"></script>"""
+NET_POS, NET_NEG = "text-green-700", "text-red-600"
+# clases que puede emitir la plantilla (para el CSS compartido, igual para todas las páginas)
+TEMPLATE_CLASSES = used_classes(PAGE_TEMPLATE + NETO_TEMPLATE + f"class='{NET_POS} {NET_NEG} font-semibold'")
+PAGE_STYLE_CLASSES = {"slide", "card"}             # definidas en el <style> de la plantilla
+_no_rule = [c for c in purge_css(TEMPLATE_CLASSES)[1] if c not in PAGE_STYLE_CLASSES]
+if _no_rule:
+    raise RuntimeError(f"[build_page] clases de la plantilla sin regla en utils/page_assets: {_no_rule}")
+_warned_classes: set = set()
+
+def _warn_unstyled(classes):
+    """Avisa (una vez por clase) de clases que quedan sin estilo en modo inline/shared."""
+    new = [c for c in classes if c not in PAGE_STYLE_CLASSES and c not in _warned_classes]
+    if new:
+        _warned_classes.update(new)
+        warnings.warn(f"[build_page] clases sin regla en el CSS local (quedan sin estilo): {new}", stacklevel=3)
+# versión del render: cambia si cambian las plantillas o el código que arma la página (build_site
+# la usa en el hash de entrada para saber qué páginas reconstruir)
+TEMPLATE_VERSION = hashlib.sha256(b"".join(
+    Path(f).read_bytes() for f in (__file__, svg_charts.__file__, page_assets.__file__))).hexdigest()[:12]
+
+def page_context(eda, narrative:dict, charts:str="js") -> dict:
+    """Campos de PAGE_TEMPLATE. charts: "js" (Chart.js en el navegador) o "svg" (prerenderado)."""
+    # 1) Barras: ventana sugerida por el LLM (capada a 24)
+    bar_n = narrative.get("flags", {}).get("bar_months", 16)
+    bar_labels, bar_values, bar_label_dates = last_n_months_from_monthly_total(eda, bar_n)
+
+    # 2) Neto por operadora: SIEMPRE últimos 12 meses si hay datos suficientes
+    neto12 = last_12m_neto_timeseries(eda)
+    show_neto = len(neto12["index"]) >= 2  # dibuja si hay ≥2 puntos
+
+    # 3) Título para la tabla (mes objetivo en español)
+    latest = _date(eda["latest_period"])
+    cutoff = mes_full(latest)
+
+    # 4) Filas de la tabla (ya solo último mes)
+    ops_rows = "".join([
+        f"<tr><td class='font-semibold'>{op['name']}</td>"
+        f"<td>{op['won']:,}</td><td>{op['lost']:,}</td>"
+        f"<td class='{NET_POS if op['net']>=0 else NET_NEG} font-semibold'>{op['net']:,}</td></tr>"
+        for op in eda["operators_current"]
+    ])
+
+    # 5) Gráficos: canvas + script de Chart.js, o SVG ya dibujado (sin JS)
+    ops = ("CLARO","ENTEL","BITEL","MOVISTAR")
+    if charts == "svg":
+        bar_chart = svg_charts.bar_chart(bar_labels, bar_values)
+        neto_chart = svg_charts.line_chart(neto12["index"], {op: neto12.get(op, []) for op in ops}) if show_neto else ""
+        chart_script = ""
+    elif charts == "js":
+        bar_chart, neto_chart = '<canvas id="barChart"></canvas>', '<canvas id="netoChart"></canvas>'
+        chart_script = CHART_SCRIPT.render({
+            "bar_labels_js": json.dumps(bar_labels, ensure_ascii=False),
+            "bar_values_js": json.dumps(bar_values),
+            "neto_idx_js": json.dumps(neto12["index"], ensure_ascii=False),
+            "neto_ds_js": json.dumps({op: neto12.get(op, []) for op in ops}),
+        })
+    else:
+        raise ValueError(f"[build_page] charts desconocido: {charts!r} (js|svg)")
+
+    # 6) Bloque opcional del neto (12m)
+    neto_block = ""
+    if show_neto:
+        neto_block = NETO_BLOCK.render({"neto_title_range": range_title_from_labels(neto12["index_dates"]),
+                                        "cutoff": cutoff, "neto_chart": neto_chart})
+    return {
+        "title": narrative["title"], "subhead": narrative["subhead"], "paragraph": narrative["paragraph"],
+        "bullets": "".join([f"<li>{b}</li>" for b in narrative.get("bullets",[])]),
+        "bar_title_range": range_title_from_labels(bar_label_dates),
+        "cutoff": cutoff, "table_title": f"Resultado neto — {cutoff}",
+        "ops_rows": ops_rows, "neto_block": neto_block,
+        "bar_chart": bar_chart, "chart_script": chart_script,
+    }
+
+def _inline_js(src: str) -> str:
+    return src.replace("</script", "<\\/script")
+
+def head_assets(body: str, assets: str, outdir=None, js: bool = True) -> str:
+    """
+    <head> de assets según el modo; `body` es la página renderizada (para purgar el CSS).
+    js=False (gráficos SVG) omite Chart.js.
+    """
+    if assets == "cdn":
+        return CDN_HEAD if js else CDN_HEAD.split("\n")[0]
+    if assets == "inline":
+        css, unknown = purge_css(used_classes(body))
+        _warn_unstyled(unknown)
+        return f"<style>{css}</style>" + (f"\n<script>{_inline_js(chartjs_source())}</script>" if js else "")
+    if assets == "shared":
+        if outdir is None:
+            raise ValueError("[build_page] assets='shared' requiere outdir")
+        css, _ = purge_css(TEMPLATE_CLASSES)                  # completo: verificado al importar
+        _warn_unstyled([c for c in used_classes(body) if c not in TEMPLATE_CLASSES])
+        return (f'<link rel="stylesheet" href="{shared_asset(outdir, "page", css, "css")}">' +
+                (f'\n<script src="{shared_asset(outdir, "chart", chartjs_source(), "js")}"></script>' if js else ""))
+    raise ValueError(f"[build_page] assets desconocido: {assets!r} (cdn|inline|shared)")
+
+def chart_mode(narrative:dict, charts:str|None=None) -> str:
+    """Modo de gráficos de una página: argumento, narrative["flags"]["charts"] o PAGE_CHARTS."""
+    return charts or (narrative.get("flags") or {}).get("charts") or PAGE_CHARTS
+
+def render_html(eda, narrative:dict, assets:str|None=None, outdir=None, charts:str|None=None):
+    """
+    eda: dict del JSON o EdaArtifact (eda.artifact.load_eda). assets: cdn | inline | shared
+    (default PAGE_ASSETS); "shared" escribe los assets en `outdir`. charts: js | svg
+    (default: narrative["flags"]["charts"] o PAGE_CHARTS); "svg" dibuja los gráficos en build time
+    y la página no necesita JS.
+    """
+    charts = chart_mode(narrative, charts)
+    ctx = page_context(eda, narrative, charts)
+    assets = assets or PAGE_ASSETS
+    js = charts == "js"
+    if assets == "cdn":
+        return PAGE.render({**ctx, "head_assets": head_assets("", assets, js=js)})
+    body = PAGE.render({**ctx, "head_assets": ""})
+    return PAGE.render({**ctx, "head_assets": head_assets(body, assets, outdir, js)})
+
+def render_many(items, outdir=None, assets:str|None=None, charts:str|None=None) -> list:
+    """
+    Renderiza varios (eda | eda_path, narrativa) en el mismo proceso, reutilizando plantillas y
+    etiquetas ya formateadas. Con `outdir` escribe cada página y devuelve las rutas; si no, el HTML.
+    """
+    out = []
+    for eda, narrative in items:
+        if isinstance(eda, (str, Path)):
+            eda = load_eda(eda)
+        html = render_html(eda, narrative, assets, outdir, charts)
+        out.append(_write_html(html, eda, outdir) if outdir else html)
+    return out
+
+def _write_html(html:str, eda, outdir) -> Path:
     Path(outdir).mkdir(exist_ok=True, parents=True)
     out = Path(outdir)/f"noticia_portabilidad_{eda['latest_period'][:7]}.html"
     out.write_text(html, encoding="utf-8")
-    return out
\ No newline at end of file
+    return out
+
+def write_page(eda_path, narrative, outdir="reports", assets:str|None=None, charts:str|None=None):
+    eda = load_eda(eda_path)        # .bin columnar si existe y está al día; si no, el JSON
+    return _write_html(render_html(eda, narrative, assets, outdir, charts), eda, outdir)
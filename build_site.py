@@ -0,0 +1,156 @@
+# build_site.py
+"""
+Sitio estático con todos los meses: una página por cada eda_YYYY-MM.json que tenga narrativa en
+data/narratives/narrativa_YYYY-MM.json, más un índice (index.html) y un manifiesto (manifest.json).
+
+Incremental: el hash de entrada de cada página es sha256(contenido del EDA JSON + narrativa +
+TEMPLATE_VERSION + assets + modo de gráficos de la página). Solo se renderizan las páginas cuyo
+hash no coincide con el del manifiesto anterior (o cuyo HTML no existe); los meses pendientes se
+renderizan en paralelo en procesos (el render es Python puro y no suelta el GIL; SITE_WORKERS,
+default: núcleos disponibles).
+
+    python -m build_site --outdir reports --assets shared --charts svg
+"""
+import os, json, hashlib, argparse, datetime as dt
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from pathlib import Path
+import build_page as B
+from eda.artifact import load_eda
+
+NARRATIVES_DIR = Path(os.getenv("NARRATIVES_DIR", "data/narratives"))
+MANIFEST = "manifest.json"
+
+def narrative_path(month: str, narr_dir=None) -> Path:
+    return Path(narr_dir or NARRATIVES_DIR)/f"narrativa_{month[:7]}.json"
+
+def save_narrative(narrative: dict, month: str, narr_dir=None) -> Path:
+    """Guarda la narrativa del mes (la genera run_news) para poder reconstruir la página sin LLM."""
+    p = narrative_path(month, narr_dir)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(narrative, ensure_ascii=False, indent=2), encoding="utf-8")
+    return p
+
+def discover(eda_dir="data/eda", narr_dir=None) -> dict:
+    """{'YYYY-MM': (eda_path, narrative_path)} para los meses con EDA y narrativa."""
+    out = {}
+    for p in sorted(Path(eda_dir).glob("eda_????-??.json")):
+        month = p.stem[4:]
+        n = narrative_path(month, narr_dir)
+        if n.exists():
+            out[month] = (p, n)
+    return out
+
+def input_hash(eda_path, narrative: dict, assets: str, charts: str) -> str:
+    h = hashlib.sha256(Path(eda_path).read_bytes())
+    h.update(json.dumps(narrative, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    h.update(f"|{B.TEMPLATE_VERSION}|{assets}|{charts}".encode())
+    return h.hexdigest()
+
+def load_manifest(outdir) -> dict:
+    p = Path(outdir)/MANIFEST
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _write_atomic(path: Path, text: str):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+
+INDEX_TEMPLATE = B.Template("""<!doctype html>
+<html lang="es"><head>
+<meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1"/>
+<title>Portabilidad móvil — archivo</title>
+{{head_assets}}
+<style>.slide{width:1280px;min-height:720px;margin:0 auto}.card{border:1px solid #e5e7eb;border-radius:14px;padding:20px}</style>
+</head><body class="text-gray-900">
+<div class="slide">
+  <div class="bg-gray-800 text-white p-6">
+    <h1 class="text-2xl font-bold">Portabilidad móvil — archivo de reportes</h1>
+    <p class="opacity-80">{{n_pages}} reportes, de {{first}} a {{last}}</p>
+  </div>
+  <div class="p-6">
+    <ul>
+      {{items}}
+    </ul>
+  </div>
+</div>
+</body></html>""")
+
+def render_index(pages: dict, assets: str, outdir) -> str:
+    """
+    pages: {'YYYY-MM': entrada del manifiesto}; el más reciente primero. Solo usa clases de
+    TEMPLATE_CLASSES, así en modo shared comparte el CSS de las páginas.
+    """
+    months = sorted(pages, reverse=True)
+    items = "".join(
+        f'<li class="card mb-2"><a class="font-semibold" href="{escape(pages[m]["html"])}">'
+        f'{B.mes_full(B._date(m + "-01"))} — {escape(pages[m]["title"])}</a>'
+        f'<p class="text-sm text-gray-500">{escape(pages[m]["subhead"])}</p></li>' for m in months)
+    first, last = (B.mes_full(B._date(m + "-01")) for m in (months[-1], months[0])) if months else ("-", "-")
+    ctx = {"n_pages": len(months), "first": first, "last": last, "items": items}
+    body = INDEX_TEMPLATE.render({**ctx, "head_assets": ""})
+    return INDEX_TEMPLATE.render({**ctx, "head_assets": B.head_assets(body, assets, outdir, js=False)})
+
+def _render_page(job):
+    """Renderiza y escribe un mes (nivel de módulo: corre en los procesos del pool)."""
+    month, eda_path, narr, h, assets, charts, outdir = job
+    eda = load_eda(eda_path)
+    out = B._write_html(B.render_html(eda, narr, assets, outdir, charts), eda, outdir)
+    return month, {"html": out.name, "input_hash": h, "eda": str(eda_path), "charts": charts,
+                   "title": narr.get("title", ""), "subhead": narr.get("subhead", ""),
+                   "built_at": dt.datetime.now().isoformat(timespec="seconds"), "rebuilt": True}
+
+def build_site(eda_dir="data/eda", narr_dir=None, outdir="reports", assets: str | None = None,
+               charts: str | None = None, workers: int | None = None, force: bool = False) -> dict:
+    """
+    Reconstruye las páginas con hash de entrada nuevo, el índice y el manifiesto; devuelve el
+    manifiesto. charts=None respeta flags.charts de cada narrativa (como write_page).
+    """
+    assets = assets or B.PAGE_ASSETS
+    outdir = Path(outdir); outdir.mkdir(parents=True, exist_ok=True)
+    prev = load_manifest(outdir).get("pages", {})
+    pages, todo = {}, []
+    for month, (eda_path, narr_path) in discover(eda_dir, narr_dir).items():
+        narr = json.loads(narr_path.read_text(encoding="utf-8"))
+        mode = B.chart_mode(narr, charts)
+        h = input_hash(eda_path, narr, assets, mode)
+        old = prev.get(month)
+        if not force and old and old["input_hash"] == h and (outdir/old["html"]).exists():
+            pages[month] = {**old, "rebuilt": False}
+        else:
+            todo.append((month, eda_path, narr, h, assets, mode, outdir))
+
+    workers = workers or int(os.getenv("SITE_WORKERS", 0)) or os.cpu_count() or 1
+    if workers <= 1 or len(todo) <= 1:
+        done = [_render_page(j) for j in todo]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as ex:
+            done = list(ex.map(_render_page, todo, chunksize=max(1, len(todo) // (4*workers))))
+    pages.update(done)
+    pages = dict(sorted(pages.items()))
+
+    _write_atomic(outdir/"index.html", render_index(pages, assets, outdir))
+    manifest = {"template_version": B.TEMPLATE_VERSION, "assets": assets, "charts": charts,
+                "built_at": dt.datetime.now().isoformat(timespec="seconds"),
+                "index": "index.html", "pages": pages}
+    _write_atomic(outdir/MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=2))
+    return manifest
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--eda-dir", default="data/eda")
+    ap.add_argument("--narratives", default=None, help="default: NARRATIVES_DIR (data/narratives)")
+    ap.add_argument("--outdir", default="reports")
+    ap.add_argument("--assets", choices=["cdn","inline","shared"], default=None)
+    ap.add_argument("--charts", choices=["js","svg"], default=None,
+                    help="fuerza el modo de todas las páginas (default: flags.charts de cada narrativa o PAGE_CHARTS)")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--force", action="store_true", help="reconstruye todas las páginas")
+    args = ap.parse_args()
+    m = build_site(args.eda_dir, args.narratives, args.outdir, args.assets, args.charts, args.workers, args.force)
+    rebuilt = [k for k, v in m["pages"].items() if v["rebuilt"]]
+    print(f"✅ {len(m['pages'])} páginas ({len(rebuilt)} reconstruidas: {', '.join(rebuilt) or 'ninguna'}) "
+          f"-> {Path(args.outdir)/'index.html'}, {Path(args.outdir)/MANIFEST}")
@@ -0,0 +1,137 @@
+# eda/artifact.py
+"""
+Formato columnar del EDA, junto a cada eda_YYYY-MM.json: eda_YYYY-MM.bin =
+MAGIC + largo de cabecera (u32) + cabecera JSON (campos escalares del EDA + offsets de columnas)
++ columnas binarias alineadas a 8 bytes (meses como int32 año*12+mes-1, valores int64).
+Las series se leen con np.memmap, así build_page toma los últimos N meses sin parsear la historia.
+
+    python -m eda.artifact data/eda/*.json      # genera/actualiza los .bin de EDA existentes
+"""
+from __future__ import annotations
+import os, json, argparse
+from pathlib import Path
+import numpy as np
+
+MAGIC = b"EDACOL1\n"
+OPERADORAS = ["CLARO","ENTEL","BITEL","MOVISTAR"]   # = portabilidad.OPERADORAS, sin importar pandas
+SERIES_KEYS = ("monthly_total", "neto_timeseries")
+
+def month_int(iso: str) -> int:
+    return int(iso[:4])*12 + int(iso[5:7]) - 1
+
+def month_iso(mi: int) -> str:
+    return f"{mi//12:04d}-{mi%12+1:02d}-01"
+
+def artifact_path(eda_path: str | Path) -> Path:
+    return Path(eda_path).with_suffix(".bin")
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+def write_artifact(eda: dict, path: str | Path) -> Path:
+    """Escribe el .bin de un EDA (dict de build_eda). Las series se guardan ordenadas por mes."""
+    mt = sorted(eda["monthly_total"], key=lambda r: r["period"])
+    nt = eda["neto_timeseries"]
+    order = np.argsort(np.array([month_int(d) for d in nt["index"]], dtype=np.int32), kind="stable")
+    cols = {
+        "monthly.month": np.array([month_int(r["period"]) for r in mt], dtype=np.int32),
+        "monthly.lines": np.array([r["lines"] for r in mt], dtype=np.int64),
+        "neto.month": np.array([month_int(d) for d in nt["index"]], dtype=np.int32)[order],
+        **{f"neto.{op}": np.asarray(nt[op], dtype=np.int64)[order] for op in OPERADORAS},
+    }
+    meta, off = {}, 0
+    for name, arr in cols.items():
+        meta[name] = {"dtype": arr.dtype.str, "offset": off, "length": len(arr)}
+        off = _align(off + arr.nbytes)
+    header = json.dumps({"version": 1, "fields": {k: v for k, v in eda.items() if k not in SERIES_KEYS},
+                         "columns": meta}, ensure_ascii=False).encode("utf-8")
+    base = _align(len(MAGIC) + 4 + len(header))
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC); f.write(len(header).to_bytes(4, "little")); f.write(header)
+        for name, arr in cols.items():
+            f.seek(base + meta[name]["offset"]); f.write(arr.tobytes())
+        f.truncate(base + off)
+    os.replace(tmp, path)
+    return path
+
+class EdaArtifact:
+    """
+    Lectura perezosa de un .bin: la cabecera al abrir, las columnas (memmap) al primer uso.
+    Se comporta como el dict del EDA para los campos escalares (eda["latest_period"], .get()).
+    """
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"[eda.artifact] {self.path} no es un EDA columnar")
+            n = int.from_bytes(f.read(4), "little")
+            header = json.loads(f.read(n))
+        self.fields, self._meta = header["fields"], header["columns"]
+        self._base = _align(len(MAGIC) + 4 + n)
+        self._buf = None
+        self._cols: dict[str, np.ndarray] = {}
+
+    def column(self, name: str) -> np.ndarray:
+        col = self._cols.get(name)
+        if col is None:
+            if self._buf is None:
+                self._buf = np.memmap(self.path, dtype=np.uint8, mode="r")
+            m, dt = self._meta[name], np.dtype(self._meta[name]["dtype"])
+            start = self._base + m["offset"]
+            col = self._cols[name] = self._buf[start:start + m["length"]*dt.itemsize].view(dt)
+        return col
+
+    def __getitem__(self, key):
+        if key in self.fields: return self.fields[key]
+        if key in SERIES_KEYS: return self._full(key)
+        raise KeyError(key)
+
+    def __contains__(self, key): return key in self.fields or key in SERIES_KEYS
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def _full(self, key):
+        if key == "monthly_total":
+            return [{"period": month_iso(int(m)), "lines": int(v)}
+                    for m, v in zip(self.column("monthly.month"), self.column("monthly.lines"))]
+        return {"index": [month_iso(int(m)) for m in self.column("neto.month")],
+                **{op: self.column(f"neto.{op}").tolist() for op in OPERADORAS}}
+
+    def to_dict(self) -> dict:
+        return {**self.fields, **{k: self._full(k) for k in SERIES_KEYS}}
+
+    def monthly_window(self, n: int) -> tuple[list[str], list[int]]:
+        """Últimos n meses de monthly_total: (fechas ISO, líneas)."""
+        months, lines = self.column("monthly.month")[-n:], self.column("monthly.lines")[-n:]
+        return [month_iso(int(m)) for m in months], lines.tolist()
+
+    def neto_window(self, since_month: int) -> dict:
+        """neto_timeseries desde el mes `since_month` (month_int) hasta el final."""
+        i = int(np.searchsorted(self.column("neto.month"), since_month, side="left"))
+        return {"index": [month_iso(int(m)) for m in self.column("neto.month")[i:]],
+                **{op: self.column(f"neto.{op}")[i:].tolist() for op in OPERADORAS}}
+
+def ensure_artifact(eda_path: str | Path) -> Path:
+    """Genera el .bin de un eda_*.json si falta o es más viejo que el JSON."""
+    eda_path, out = Path(eda_path), artifact_path(eda_path)
+    if not out.exists() or out.stat().st_mtime_ns < eda_path.stat().st_mtime_ns:
+        write_artifact(json.loads(eda_path.read_text(encoding="utf-8")), out)
+    return out
+
+def load_eda(eda_path: str | Path):
+    """EDA para lectura: el artefacto columnar si está al día; si no, el dict del JSON."""
+    eda_path, art = Path(eda_path), artifact_path(eda_path)
+    if art.exists() and art.stat().st_mtime_ns >= eda_path.stat().st_mtime_ns:
+        return EdaArtifact(art)
+    return json.loads(eda_path.read_text(encoding="utf-8"))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Genera el formato columnar (.bin) de EDA existentes.")
+    ap.add_argument("paths", nargs="+")
+    args = ap.parse_args()
+    for p in args.paths:
+        out = ensure_artifact(p)
+        print(f"{p} -> {out} ({out.stat().st_size:,} B vs {Path(p).stat().st_size:,} B JSON)")
@@ -0,0 +1,169 @@
+# eda/cube.py
+"""
+Cubo de agregados Punku persistido: (Mes × Cedente_b × Receptor_b × Mod_Cedente × Mod_Receptor)
+→ líneas (y filas de origen), disperso (solo celdas con datos) en un .npz por Excel de origen.
+Mientras el Excel no cambie, build_eda y los cortes por modalidad leen del cubo, no de las filas;
+si cambia, se re-agrega en una pasada de bincount sobre las filas del caché Parquet.
+
+    python -m eda.cube --excel "8.1. PORTABILIDAD MÓVIL.xlsx"               # crea/actualiza
+    python -m eda.cube --excel "8.1. PORTABILIDAD MÓVIL.xlsx" --neto Postpago  # neto pospago
+"""
+from __future__ import annotations
+import os, json, hashlib, argparse, datetime as dt
+from pathlib import Path
+import numpy as np, pandas as pd
+from .portabilidad import OPERADORAS, load_excel, _file_sha
+
+# Un cubo por Excel (nombre = hash de la ruta resuelta, como parquet_cache); EDA_CUBE_PATH fija un
+# único archivo para cualquier origen.
+CUBE_DIR = Path(os.getenv("EDA_CUBE_DIR", "data/eda/cubes"))
+CUBE_PATH = Path(os.environ["EDA_CUBE_PATH"]) if os.getenv("EDA_CUBE_PATH") else None
+DIMS = ("Cedente_b", "Receptor_b", "Mod_Cedente", "Mod_Receptor")
+CUBE_COLUMNS = ["Mes", "Lineas", *DIMS]
+
+def _codes(col):
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return col.cat.codes.to_numpy().astype(np.int64), list(col.cat.categories)
+    codes, cats = pd.factorize(col, use_na_sentinel=True)
+    return codes.astype(np.int64), list(cats)
+
+class Cube:
+    """Celdas del cubo como columnas paralelas: fecha exacta, códigos por dimensión, líneas, filas."""
+    def __init__(self, date, codes: dict, cats: dict, lines, rows, meta: dict | None = None):
+        self.date, self.codes, self.cats = date, codes, cats
+        self.lines, self.rows = lines, rows
+        self.meta = meta or {}
+
+    def __len__(self): return len(self.lines)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, meta: dict | None = None) -> "Cube":
+        """Agrega filas crudas (o celdas de otro cubo, con columna Filas) en una pasada de bincount."""
+        d, fechas = pd.factorize(df["Mes"], use_na_sentinel=True)
+        d = d.astype(np.int64)
+        parts = [_codes(df[c]) for c in DIMS]
+        shape = (len(fechas), *[len(cats)+1 for _, cats in parts])   # +1: vacío (código -1) va a 0
+        ok = d >= 0
+        key = np.ravel_multi_index((d[ok], *[codes[ok]+1 for codes, _ in parts]), shape)
+        size = int(np.prod(shape))
+        w = df["Lineas"].to_numpy(dtype=np.float64, na_value=0.0)[ok]
+        n = df["Filas"].to_numpy(dtype=np.float64)[ok] if "Filas" in df else None
+        rows = np.bincount(key, weights=n, minlength=size)
+        cells = np.flatnonzero(rows)
+        lines = np.bincount(key, weights=w, minlength=size)[cells]
+        idx = np.unravel_index(cells, shape)
+        integer = pd.api.types.is_integer_dtype(df["Lineas"].dtype)
+        return cls(date=pd.DatetimeIndex(fechas).to_numpy(dtype="datetime64[ns]")[idx[0]],
+                   codes={c: (idx[i+1]-1).astype(np.int16) for i, c in enumerate(DIMS)},
+                   cats={c: parts[i][1] for i, c in enumerate(DIMS)},
+                   lines=lines.astype(np.int64) if integer else lines, rows=rows[cells].astype(np.int64),
+                   meta={"integer": integer, **(meta or {})})
+
+    def frame(self) -> pd.DataFrame:
+        """Celdas como DataFrame (dimensiones categóricas); sirve de entrada a portabilidad.aggregate."""
+        df = pd.DataFrame({"Mes": self.date})
+        for c in DIMS:
+            df[c] = pd.Categorical.from_codes(self.codes[c].astype(np.int64), categories=self.cats[c])
+        df["Lineas"], df["Filas"] = self.lines, self.rows
+        return df
+
+    def dates(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(np.unique(self.date))
+
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez_compressed(tmp, date=self.date, lines=self.lines, rows=self.rows,
+                            **{f"code_{c}": self.codes[c] for c in DIMS},
+                            **{f"cats_{c}": np.asarray(self.cats[c], dtype=str) for c in DIMS},
+                            meta=np.asarray(json.dumps(self.meta, ensure_ascii=False)))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Cube":
+        with np.load(Path(path)) as z:
+            return cls(date=z["date"], lines=z["lines"], rows=z["rows"],
+                       codes={c: z[f"code_{c}"] for c in DIMS},
+                       cats={c: z[f"cats_{c}"].tolist() for c in DIMS},
+                       meta=json.loads(str(z["meta"])))
+
+def fingerprints(cube: Cube) -> pd.Series:
+    """
+    Huella por fecha del desglose completo (dimensiones por nombre, líneas, filas): suma de los
+    hashes de sus celdas, independiente del orden y de la codificación de categorías.
+    """
+    f = cube.frame()
+    f["Lineas"] = f["Lineas"].astype(np.float64)
+    h = pd.util.hash_pandas_object(f, index=False).to_numpy()
+    return pd.Series(h, index=pd.DatetimeIndex(cube.date)).groupby(level=0).sum()
+
+def cube_file(path_excel: str | Path) -> Path:
+    """Archivo del cubo para un Excel: EDA_CUBE_PATH o <EDA_CUBE_DIR>/cube_<hash de la ruta>.npz."""
+    if CUBE_PATH is not None:
+        return CUBE_PATH
+    name = hashlib.sha256(str(Path(path_excel).resolve()).encode("utf-8")).hexdigest()[:16]
+    return CUBE_DIR/f"cube_{name}.npz"
+
+def update_cube(path_excel: str, cube_path: str | Path | None = None) -> Cube:
+    """
+    Cubo al día con el Excel. Si el archivo no cambió (tamaño/mtime o sha256) no toca los datos;
+    si cambió, el cubo nuevo sale de una pasada sobre las filas (Cube.from_frame) y se guarda tal
+    cual. changed_dates cuenta las fechas nuevas, eliminadas o con otras celdas (huella por fecha:
+    un cambio de operadora/modalidad que conserva los totales también cuenta).
+    """
+    path = Path(cube_path) if cube_path else cube_file(path_excel)
+    src = Path(path_excel); st = src.stat()
+    cube = Cube.load(path) if path.exists() else None
+    m = cube.meta if cube else {}
+    if cube and m.get("size") == st.st_size and m.get("mtime_ns") == st.st_mtime_ns:
+        cube.meta["changed_dates"] = 0
+        return cube
+    sha = _file_sha(src)
+    source = {"source": str(src.resolve()), "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+    if cube and m.get("sha256") == sha:
+        cube.meta.update(source, changed_dates=0); cube.save(path)
+        return cube
+    df = load_excel(path_excel, columns=CUBE_COLUMNS)
+    now = Cube.from_frame(df, {"updated_at": dt.datetime.now().isoformat(timespec="seconds"), **source})
+    if cube is None:
+        changed = len(now.dates())
+    else:
+        new_fp, old_fp = fingerprints(now).to_dict(), fingerprints(cube).to_dict()
+        changed = sum(new_fp.get(d) != old_fp.get(d) for d in new_fp.keys() | old_fp.keys())
+    now.meta["changed_dates"] = changed
+    now.save(path)
+    return now
+
+def net_by_operator(cube: Cube, modalidad: str | None = None) -> pd.DataFrame:
+    """
+    Neto (ganadas - perdidas) por mes × operadora. Con `modalidad` (p. ej. "Postpago"): ganadas
+    hacia esa modalidad (Mod_Receptor) menos perdidas desde ella (Mod_Cedente).
+    """
+    f = cube.frame()
+    mes = f["Mes"].dt.to_period("M").dt.to_timestamp()
+    won_ok = lost_ok = np.ones(len(f), dtype=bool)
+    if modalidad:
+        key = modalidad.casefold()
+        won_ok = f["Mod_Receptor"].astype(object).str.casefold().eq(key).to_numpy()
+        lost_ok = f["Mod_Cedente"].astype(object).str.casefold().eq(key).to_numpy()
+    won = f["Lineas"].where(won_ok, 0).groupby([mes, f["Receptor_b"].astype(object)]).sum().unstack()
+    lost = f["Lineas"].where(lost_ok, 0).groupby([mes, f["Cedente_b"].astype(object)]).sum().unstack()
+    neto = won.sub(lost, fill_value=0).reindex(columns=OPERADORAS).fillna(0.0)
+    neto.index.name, neto.columns.name = "Mes", "Empresa"
+    return neto.sort_index()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Crea/actualiza el cubo de agregados Punku.")
+    ap.add_argument("--excel", required=True)
+    ap.add_argument("--cube", default=None, help="default: EDA_CUBE_PATH o data/eda/cubes/cube_<hash>.npz por Excel")
+    ap.add_argument("--neto", default=None, metavar="MODALIDAD", help='imprime neto por operadora (p. ej. "Postpago")')
+    ap.add_argument("--last", type=int, default=12)
+    args = ap.parse_args()
+    cube = update_cube(args.excel, args.cube)
+    d = cube.dates()
+    print(f"cubo: {len(cube):,} celdas, {len(d)} fechas ({d.min().date()} .. {d.max().date()}), "
+          f"fechas cambiadas: {cube.meta.get('changed_dates', 0)}")
+    if args.neto:
+        print(net_by_operator(cube, args.neto).tail(args.last).astype(int).to_string())
@@ -1,6 +1,8 @@
 # eda/portabilidad.py
-import pandas as pd, json
+import pandas as pd, numpy as np, json, os, time, hashlib, argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from .artifact import write_artifact, artifact_path
 
 BRAND_MAP = {
   "América Móvil Perú S.A.C.": "CLARO",
@@ -13,29 +15,151 @@ MES_ABR = ["Ene","Feb","Mar","Abr","May","Jun","Jul","Ago","Sep","Oct","Nov","Di
 
 def month_label(ts): return f"{MES_ABR[ts.month-1]}-{str(ts.year)[2:]}"
 
-def load_excel(path:str):
+# Caché Parquet del Excel ya limpio (marcas mapeadas, dtypes compactos). Se invalida por
+# contenido: (tamaño, mtime) rápido y, si cambió el mtime, sha256 del archivo.
+EDA_CACHE_DIR = Path(os.getenv("EDA_CACHE_DIR", "data/cache/eda"))
+EDA_CACHE = os.getenv("EDA_CACHE", "1") != "0"
+CATEGORY_COLS = ["Cedente","Receptor","Mod_Cedente","Mod_Receptor","Cedente_b","Receptor_b"]
+
+def _read_excel(path:str):
     df = pd.read_excel(path, sheet_name="Dataset", header=3, usecols="B:G", parse_dates=["Mes"])
     df.columns = ["Cedente","Receptor","Mod_Cedente","Mod_Receptor","Mes","Lineas"]
     df["Cedente_b"]  = df["Cedente"].map(BRAND_MAP).fillna(df["Cedente"])
     df["Receptor_b"] = df["Receptor"].map(BRAND_MAP).fillna(df["Receptor"])
     return df
 
+def _compact(df):
+    df = df.copy()
+    for c in CATEGORY_COLS:
+        df[c] = df[c].astype("category")
+    if df["Lineas"].notna().all():
+        df["Lineas"] = pd.to_numeric(df["Lineas"], downcast="integer")
+    return df
+
+def _file_sha(path:Path)->str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for b in iter(lambda: f.read(1 << 20), b""): h.update(b)
+    return h.hexdigest()
+
+def parquet_cache(path:str, cache_dir:str|Path|None=None)->Path|None:
+    """
+    Ruta del Parquet limpio para el Excel `path`, convirtiéndolo si no existe o cambió.
+    None si no hay motor Parquet (pyarrow) o EDA_CACHE=0.
+    """
+    if not EDA_CACHE: return None
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    src = Path(path); st = src.stat()
+    d = Path(cache_dir) if cache_dir else EDA_CACHE_DIR
+    name = hashlib.sha256(str(src.resolve()).encode("utf-8")).hexdigest()[:16]
+    pq, meta_p = d/f"{name}.parquet", d/f"{name}.json"
+    meta = json.loads(meta_p.read_text(encoding="utf-8")) if meta_p.exists() else {}
+    if pq.exists() and meta.get("size") == st.st_size and meta.get("mtime_ns") == st.st_mtime_ns:
+        return pq
+    sha = _file_sha(src)
+    if not (pq.exists() and meta.get("sha256") == sha):
+        d.mkdir(parents=True, exist_ok=True)
+        tmp = pq.with_suffix(".tmp")
+        _compact(_read_excel(path)).to_parquet(tmp, index=False)
+        os.replace(tmp, pq)
+    meta = {"source": str(src), "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+    meta_p.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    return pq
+
+def load_excel(path:str, columns:list[str]|None=None):
+    """
+    Dataset Punku limpio (con Cedente_b/Receptor_b). Lee del caché Parquet si está al día;
+    `columns` limita las columnas cargadas (solo aplica con caché).
+    """
+    pq = parquet_cache(path)
+    if pq is None:
+        df = _read_excel(path)
+        return df[columns] if columns else df
+    return pd.read_parquet(pq, columns=columns)
+
+EDA_COLUMNS = ["Mes","Lineas","Cedente_b","Receptor_b"]
+EDA_CUBE = os.getenv("EDA_CUBE", "1") != "0"
+
+def eda_frame(path_excel:str):
+    """
+    Entrada de aggregate(): celdas del cubo persistido de este Excel (eda/cube.py, se re-agrega
+    solo si el archivo cambió) o, con EDA_CUBE=0, las filas del Excel.
+    """
+    if EDA_CUBE:
+        from .cube import update_cube
+        return update_cube(path_excel).frame()
+    return load_excel(path_excel, columns=EDA_COLUMNS)
+
 def compute_monthly(df):
     return (df.groupby(df["Mes"].dt.to_period("M"))["Lineas"]
               .sum().to_timestamp().sort_index())
 
 def compute_neto_por_operador(df):
-    g = (df.groupby([df["Mes"].dt.to_period("M").dt.to_timestamp(), "Receptor_b"])["Lineas"]
+    g = (df.groupby([df["Mes"].dt.to_period("M").dt.to_timestamp(), "Receptor_b"], observed=True)["Lineas"]
            .sum().reset_index().rename(columns={"Lineas":"Ganadas","Receptor_b":"Empresa"}))
-    p = (df.groupby([df["Mes"].dt.to_period("M").dt.to_timestamp(), "Cedente_b"])["Lineas"]
+    p = (df.groupby([df["Mes"].dt.to_period("M").dt.to_timestamp(), "Cedente_b"], observed=True)["Lineas"]
            .sum().reset_index().rename(columns={"Lineas":"Perdidas","Cedente_b":"Empresa"}))
     neto = pd.merge(g, p, on=["Mes","Empresa"], how="outer").fillna(0.0)
     neto["Neto"] = neto["Ganadas"] - neto["Perdidas"]
-    piv = neto.pivot_table(index="Mes", columns="Empresa", values="Neto", aggfunc="sum").fillna(0.0)
+    piv = neto.pivot_table(index="Mes", columns="Empresa", values="Neto", aggfunc="sum", observed=True).fillna(0.0)
     for e in OPERADORAS:
         if e not in piv.columns: piv[e]=0.0
     return piv[OPERADORAS].sort_index()
 
+def _op_codes(col)->np.ndarray:
+    """Código 0..3 (índice en OPERADORAS) por fila; 4 = otra empresa, 5 = vacío."""
+    codes, cats = (col.cat.codes.to_numpy(), col.cat.categories) if isinstance(col.dtype, pd.CategoricalDtype) \
+                  else pd.factorize(col, use_na_sentinel=True)
+    lut = np.array([OPERADORAS.index(c) if c in OPERADORAS else 4 for c in cats] + [5], dtype=np.int64)
+    return lut[codes]          # código -1 (NaN) cae en la última entrada
+
+def aggregate(df, target=None)->dict:
+    """
+    Todos los agregados de build_eda en una pasada: fecha y operadoras como códigos enteros y un
+    np.bincount sobre (fecha, receptor, cedente); meses, ganadas/perdidas y la tabla de `target`
+    (fecha exacta, como antes) salen de ese cubo chico. Mismos valores que compute_monthly,
+    compute_neto_por_operador y el filtro por mes anteriores.
+    """
+    d, fechas = pd.factorize(df["Mes"], use_na_sentinel=True)     # ~1 fecha distinta por mes
+    rec, ced = _op_codes(df["Receptor_b"]), _op_codes(df["Cedente_b"])
+    w = df["Lineas"].to_numpy(dtype=np.float64, na_value=0.0)
+    key = d*36 + rec*6 + ced
+    if (d < 0).any():                                              # Mes vacío: fuera, como en groupby
+        ok = d >= 0
+        key, w = key[ok], w[ok]
+    K = len(fechas)
+    tot = np.bincount(key, weights=w, minlength=K*36).reshape(K, 6, 6)
+    cnt = np.bincount(key, minlength=K*36).reshape(K, 6, 6)
+
+    meses, mi = np.unique(pd.DatetimeIndex(fechas).to_period("M").to_timestamp().to_numpy(), return_inverse=True)
+    tot_m = np.zeros((len(meses), 6, 6)); np.add.at(tot_m, mi, tot)
+    cnt_m = np.zeros((len(meses), 6, 6), dtype=np.int64); np.add.at(cnt_m, mi, cnt)
+
+    integer = pd.api.types.is_integer_dtype(df["Lineas"].dtype)
+    lines = tot_m.sum(axis=(1, 2))
+    monthly = pd.Series(lines.astype(np.int64) if integer else lines,
+                        index=pd.DatetimeIndex(meses, name="Mes"), name="Lineas")
+    # un mes entra al pivot si tiene alguna fila con receptor o cedente (cualquier empresa)
+    has_op = (cnt_m[:, :5, :].sum(axis=(1, 2)) + cnt_m[:, :, :5].sum(axis=(1, 2))) > 0
+    neto = tot_m.sum(axis=2) - tot_m.sum(axis=1)                   # ganadas (receptor) - perdidas (cedente)
+    neto_piv = pd.DataFrame(neto[has_op, :4], index=pd.DatetimeIndex(meses[has_op], name="Mes"),
+                            columns=pd.Index(OPERADORAS, name="Empresa"))
+
+    agg = {"monthly": monthly, "neto_piv": neto_piv, "dates": pd.Index(fechas), "by_date": tot}
+    agg["operators"] = operators_table(agg, target) if target is not None else []
+    return agg
+
+def operators_table(agg:dict, target)->list[dict]:
+    """Ganadas/perdidas/neto por operadora en la fecha exacta `target` (sin volver a los datos)."""
+    pos = agg["dates"].get_indexer([pd.Timestamp(target)])[0]
+    g = agg["by_date"][pos].sum(axis=1) if pos >= 0 else np.zeros(6)
+    p = agg["by_date"][pos].sum(axis=0) if pos >= 0 else np.zeros(6)
+    return [{"name":op,"won":int(g[i]),"lost":int(p[i]),"net":int(g[i])-int(p[i])}
+            for i, op in enumerate(OPERADORAS)]
+
 def rollups(monthly):
     df = monthly.to_frame("lines").sort_index()
     df["mom"] = df["lines"].pct_change()
@@ -58,38 +182,14 @@ def recommend_neto_chart(neto_piv, target):
     row = neto_piv.loc[target]
     return bool((row.abs().max() >= 10000) or (target.month == 1))
 
-def build_eda(path_excel:str, target_month:str|None=None, outdir="data/eda"):
-    df = load_excel(path_excel)
-    monthly = compute_monthly(df)
-    target = pd.Timestamp(target_month) if target_month else monthly.index.max()
-
-    neto_piv = compute_neto_por_operador(df)
-    # Tabla mensual (ganadas/perdidas/neto)
-    g_mes = (df[df["Mes"]==target].groupby("Receptor_b")["Lineas"].sum())
-    p_mes = (df[df["Mes"]==target].groupby("Cedente_b")["Lineas"].sum())
-    tabla = []
-    for op in OPERADORAS:
-        won  = int(g_mes.reindex([op]).fillna(0).iloc[0])
-        lost = int(p_mes.reindex([op]).fillna(0).iloc[0])
-        tabla.append({"name":op,"won":won,"lost":lost,"net":won-lost})
-
-    # rollups
-    df_roll, q, h, y = rollups(monthly)
-
-    eda = {
-      "topic":"portabilidad_movil_peru",
-      "latest_period": str(target.date()),
-      "layout": recommend_layout(target),
-      "comparatives":{
-        "mom_delta_pct": float(df_roll.loc[target,"mom"]) if target in df_roll.index else None,
-        "yoy_delta_pct": float(df_roll.loc[target,"yoy"]) if target in df_roll.index else None
-      },
+def _series_parts(monthly, neto_piv)->dict:
+    """Partes del EDA que no dependen del mes objetivo (historia completa)."""
+    return {
       "monthly_total":[{"period":str(ts.date()),"lines":int(v)} for ts,v in monthly.items()],
       "chart_last16":{
         "labels":[month_label(ts) for ts in monthly.tail(16).index],
         "values":[int(v) for v in monthly.tail(16).values]
       },
-      "operators_current": tabla,
       "neto_timeseries":{
         "index":[str(ts.date()) for ts in neto_piv.index],
         "CLARO":   [int(x) for x in neto_piv["CLARO"].tolist()],
@@ -97,12 +197,83 @@ def build_eda(path_excel:str, target_month:str|None=None, outdir="data/eda"):
         "BITEL":   [int(x) for x in neto_piv["BITEL"].tolist()],
         "MOVISTAR":[int(x) for x in neto_piv["MOVISTAR"].tolist()],
       },
+    }
+
+def _eda_doc(agg:dict, df_roll, parts:dict, target)->dict:
+    neto_piv = agg["neto_piv"]
+    return {
+      "topic":"portabilidad_movil_peru",
+      "latest_period": str(target.date()),
+      "layout": recommend_layout(target),
+      "comparatives":{
+        "mom_delta_pct": float(df_roll.loc[target,"mom"]) if target in df_roll.index else None,
+        "yoy_delta_pct": float(df_roll.loc[target,"yoy"]) if target in df_roll.index else None
+      },
+      "monthly_total": parts["monthly_total"],
+      "chart_last16": parts["chart_last16"],
+      "operators_current": operators_table(agg, target),
+      "neto_timeseries": parts["neto_timeseries"],
       "recommendations":{
         "include_neto_timeseries": recommend_neto_chart(neto_piv, target)
       }
     }
-    Path(outdir).mkdir(parents=True, exist_ok=True)
-    yyyymm = target.strftime("%Y-%m")
-    out = Path(outdir)/f"eda_{yyyymm}.json"
+
+def _write_eda(eda:dict, target, outdir)->Path:
+    out = Path(outdir)/f"eda_{target.strftime('%Y-%m')}.json"
     out.write_text(json.dumps(eda, ensure_ascii=False, indent=2), encoding="utf-8")
-    return out
\ No newline at end of file
+    write_artifact(eda, artifact_path(out))      # eda_YYYY-MM.bin: series columnares para build_page
+    return out
+
+def build_eda(path_excel:str, target_month:str|None=None, outdir="data/eda"):
+    df = eda_frame(path_excel)
+    if target_month:
+        target = pd.Timestamp(target_month)
+    else:
+        target = df["Mes"].max().to_period("M").to_timestamp()
+    agg = aggregate(df)
+    # rollups
+    df_roll, q, h, y = rollups(agg["monthly"])
+    eda = _eda_doc(agg, df_roll, _series_parts(agg["monthly"], agg["neto_piv"]), target)
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+    return _write_eda(eda, target, outdir)
+
+def build_eda_range(path_excel:str, start:str|None=None, end:str|None=None, outdir="data/eda",
+                    workers:int|None=None)->list[Path]:
+    """
+    Backfill: eda_YYYY-MM.json para cada mes de [start, end] (default: todos los meses con datos)
+    leyendo el Excel y agregando una sola vez; la historia común se arma una vez y la
+    serialización/escritura va en paralelo (EDA_WORKERS, default 4).
+    """
+    df = eda_frame(path_excel)
+    agg = aggregate(df)
+    monthly = agg["monthly"]
+    if monthly.empty: return []
+    start = pd.Timestamp(start) if start else monthly.index.min()
+    end = pd.Timestamp(end) if end else monthly.index.max()
+    targets = [t for t in pd.date_range(start, end, freq="MS") if t in agg["neto_piv"].index]
+    df_roll = rollups(monthly)[0]
+    parts = _series_parts(monthly, agg["neto_piv"])
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+    workers = workers or int(os.getenv("EDA_WORKERS", 4))
+    write = lambda t: _write_eda(_eda_doc(agg, df_roll, parts, t), t, outdir)
+    if workers <= 1 or len(targets) <= 1:
+        return [write(t) for t in targets]
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(write, targets))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="EDA de portabilidad para un mes o un rango (backfill).")
+    ap.add_argument("--excel", required=True)
+    ap.add_argument("--target-month", default=None, help="un mes: YYYY-MM-01 (default: último)")
+    ap.add_argument("--from", dest="start", default=None, help="backfill desde YYYY-MM-01")
+    ap.add_argument("--to", dest="end", default=None, help="backfill hasta YYYY-MM-01")
+    ap.add_argument("--all", action="store_true", help="backfill de todos los meses")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--outdir", default="data/eda")
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    if args.start or args.end or args.all:
+        outs = build_eda_range(args.excel, args.start, args.end, args.outdir, args.workers)
+        print(f"{len(outs)} EDA escritos en {args.outdir} ({time.perf_counter()-t0:.2f}s)")
+    else:
+        print(build_eda(args.excel, args.target_month, args.outdir))
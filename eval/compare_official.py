@@ -1,13 +1,12 @@
 # eval/compare_official.py
-import re, requests
-from io import BytesIO
-from markitdown import MarkItDown
+import re
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from utils.web_cache import get_markdown
 
 def fetch_markdown(url:str)->str:
-    html = requests.get(url, timeout=60).content
-    return MarkItDown().convert_stream(BytesIO(html), extension=".html").text_content
+    # misma caché que la ingesta: --compare no vuelve a descargar la nota oficial
+    return get_markdown(url)
 
 def tfidf_cosine(a:str, b:str)->float:
     v = TfidfVectorizer().fit_transform([a, b])
@@ -1,4 +1,8 @@
-import os, requests
+import os, re, math, time, random, asyncio, sqlite3, hashlib, threading, unicodedata, weakref, requests
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -11,12 +15,293 @@ HEADERS={
 }
 MODEL=os.getenv("EMBEDDING_MODEL","cohere/Cohere-embed-v3-multilingual")
 
+# Backend: "remote" (GitHub Models), "local" (sentence-transformers/ONNX desde EMBED_LOCAL_PATH)
+# o "hashing" (proyección por hashing de palabras, sin modelo ni red).
+BACKEND=os.getenv("EMBED_BACKEND","remote").lower()
+LOCAL_PATH=os.getenv("EMBED_LOCAL_PATH","")
+# hashing: dimensión propia (distinta de los 1024 de Cohere, así un índice de un backend nunca
+# pasa el chequeo de dimensión del otro)
+DIM=int(os.getenv("EMBED_DIM",1024 if BACKEND=="remote" else 768))
+
+# Caché persistente de embeddings: LRU en memoria delante de SQLite, clave (modelo, sha256(texto)).
+CACHE_PATH=os.getenv("EMBED_CACHE_PATH","data/cache/embeddings.sqlite")
+CACHE_ON=os.getenv("EMBED_CACHE","1").lower() not in ("0","false","no")
+LRU_SIZE=int(os.getenv("EMBED_LRU_SIZE",2048))
+MAX_ROWS=int(os.getenv("EMBED_CACHE_MAX_ROWS",200_000))
+
+# Límites por request (Cohere v3 acepta hasta 96 textos) y política de reintentos
+MAX_BATCH=int(os.getenv("EMBED_MAX_BATCH",96))
+MAX_BATCH_TOKENS=int(os.getenv("EMBED_MAX_BATCH_TOKENS",16_000))   # estimado ~4 chars/token
+PARALLEL=int(os.getenv("EMBED_PARALLEL",4))
+MAX_RETRIES=int(os.getenv("EMBED_MAX_RETRIES",6))
+MAX_WAIT=float(os.getenv("EMBED_MAX_WAIT",60))
+
+class _EmbedCache:
+    def __init__(self, path:str, lru_size:int, max_rows:int):
+        self.path, self.lru_size, self.max_rows = path, lru_size, max_rows
+        self.lru=OrderedDict(); self.lock=threading.Lock(); self.db=None
+        self.stats={"lru_hit":0, "disk_hit":0, "miss":0}
+
+    def _conn(self):
+        if self.db is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self.db=sqlite3.connect(self.path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS emb (k TEXT PRIMARY KEY, vec BLOB, used_at REAL)")
+        return self.db
+
+    @staticmethod
+    def key(model:str, text:str)->str:
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, k, v):
+        self.lru[k]=v; self.lru.move_to_end(k)
+        while len(self.lru) > self.lru_size: self.lru.popitem(last=False)
+
+    def get_many(self, keys:list[str])->list:
+        out=[None]*len(keys); missing=[]
+        with self.lock:
+            for i,k in enumerate(keys):
+                v=self.lru.get(k)
+                if v is not None:
+                    self.lru.move_to_end(k); out[i]=v; self.stats["lru_hit"]+=1
+                else:
+                    missing.append(i)
+            if missing:
+                db=self._conn(); want={keys[i] for i in missing}
+                rows={}
+                ks=list(want)
+                for j in range(0, len(ks), 500):
+                    part=ks[j:j+500]
+                    q=f"SELECT k, vec FROM emb WHERE k IN ({','.join('?'*len(part))})"
+                    rows.update(db.execute(q, part).fetchall())
+                if rows:
+                    db.executemany("UPDATE emb SET used_at=? WHERE k=?", [(time.time(),k) for k in rows])
+                    db.commit()
+                for i in missing:
+                    blob=rows.get(keys[i])
+                    if blob is None:
+                        self.stats["miss"]+=1; continue
+                    v=array("f"); v.frombytes(blob); v=v.tolist()
+                    out[i]=v; self._remember(keys[i], v); self.stats["disk_hit"]+=1
+        return out
+
+    def put_many(self, keys:list[str], vecs:list[list[float]]):
+        with self.lock:
+            db=self._conn(); now=time.time()
+            db.executemany("INSERT OR REPLACE INTO emb (k, vec, used_at) VALUES (?,?,?)",
+                           [(k, array("f", v).tobytes(), now) for k,v in zip(keys,vecs)])
+            for k,v in zip(keys,vecs): self._remember(k, v)
+            n=db.execute("SELECT COUNT(*) FROM emb").fetchone()[0]
+            if n > self.max_rows:   # desaloja los menos usados
+                db.execute("DELETE FROM emb WHERE k IN (SELECT k FROM emb ORDER BY used_at LIMIT ?)",
+                           (n-self.max_rows,))
+            db.commit()
+
+_cache=_EmbedCache(CACHE_PATH, LRU_SIZE, MAX_ROWS)
+_remote_calls=0
+
+def cache_stats()->dict:
+    """Contadores de la caché de embeddings (lru_hit, disk_hit, miss) + llamadas remotas."""
+    return {**_cache.stats, "remote_calls":_remote_calls}
+
+def _approx_tokens(text:str)->int:
+    return len(text)//4 + 1
+
+def _batches(texts:list[str])->list[tuple[int,int]]:
+    """Rangos [i,j) consecutivos que respetan MAX_BATCH textos y MAX_BATCH_TOKENS."""
+    out=[]; i=0; tok=0
+    for j,t in enumerate(texts):
+        n=_approx_tokens(t)
+        if j>i and (j-i >= MAX_BATCH or tok+n > MAX_BATCH_TOKENS):
+            out.append((i,j)); i=j; tok=0
+        tok+=n
+    if i < len(texts): out.append((i,len(texts)))
+    return out
+
+def _retry_wait(r, attempt:int)->float:
+    """Segundos a esperar según retry-after / x-ratelimit-reset; si no vienen, backoff exponencial."""
+    for h in ("retry-after","x-ratelimit-reset"):
+        v=r.headers.get(h) if r is not None else None
+        try: v=float(v)
+        except (TypeError, ValueError): continue
+        if v > 1e9: v-=time.time()   # algunos proveedores mandan epoch en vez de segundos
+        return min(max(v,0.5), MAX_WAIT)
+    return min(2**attempt + random.random(), MAX_WAIT)
+
+def _post_batch(texts:list[str])->list[list[float]]:
+    global _remote_calls
+    for attempt in range(MAX_RETRIES+1):
+        r=None
+        try:
+            _remote_calls+=1
+            r=requests.post(f"{BASE}/inference/embeddings",
+                headers=HEADERS, json={"model":MODEL,"input":texts}, timeout=60)
+            if r.status_code != 429 and r.status_code < 500:
+                r.raise_for_status()
+                return [row["embedding"] for row in r.json()["data"]]
+        except (requests.ConnectionError, requests.Timeout):
+            pass
+        if attempt == MAX_RETRIES: break
+        wait=_retry_wait(r, attempt)
+        print(f"[EMBED] status={getattr(r,'status_code','net')} remaining={r.headers.get('x-ratelimit-remaining') if r is not None else None} "
+              f"reintento {attempt+1}/{MAX_RETRIES} en {wait:.1f}s")
+        time.sleep(wait)
+    if r is not None: r.raise_for_status()
+    raise requests.ConnectionError(f"[EMBED] sin respuesta tras {MAX_RETRIES} reintentos")
+
+def _embed_remote(texts:list[str])->list[list[float]]:
+    """Parte en batches, los manda en paralelo (hasta PARALLEL) y devuelve en el orden original."""
+    spans=_batches(texts)
+    if len(spans) <= 1:
+        return _post_batch(texts) if texts else []
+    with ThreadPoolExecutor(max_workers=max(1,min(PARALLEL,len(spans)))) as ex:
+        parts=ex.map(lambda ij: _post_batch(texts[ij[0]:ij[1]]), spans)
+        return [v for part in parts for v in part]
+
+_local_model=None
+_local_lock=threading.Lock()
+
+def _get_local_model():
+    global _local_model
+    with _local_lock:
+        if _local_model is None:
+            if not LOCAL_PATH:
+                raise ValueError("EMBED_BACKEND=local requiere EMBED_LOCAL_PATH (carpeta del modelo)")
+            from sentence_transformers import SentenceTransformer   # opcional: solo para backend local
+            kw={"backend":"onnx"} if os.getenv("EMBED_LOCAL_ONNX","").lower() in ("1","true","yes") else {}
+            _local_model=SentenceTransformer(LOCAL_PATH, device="cpu", **kw)
+        return _local_model
+
+def _embed_local(texts:list[str])->list[list[float]]:
+    m=_get_local_model()
+    return m.encode(texts, batch_size=32, normalize_embeddings=True, convert_to_numpy=True).tolist()
+
+_TOKEN=re.compile(r"\w+")
+
+def _tokens(text:str)->list[str]:
+    t=unicodedata.normalize("NFKD", text.lower())
+    t="".join(ch for ch in t if not unicodedata.combining(ch))   # "portación" == "portacion"
+    return _TOKEN.findall(t)
+
+def _embed_hashing(texts:list[str])->list[list[float]]:
+    """Hashing trick con signo sobre unigramas+bigramas, tf sublineal y norma L2 (coseno-ready)."""
+    out=[]
+    for text in texts:
+        toks=_tokens(text)
+        feats={}
+        for f in toks + [a+" "+b for a,b in zip(toks,toks[1:])]:
+            feats[f]=feats.get(f,0)+1
+        v=[0.0]*DIM
+        for f,tf in feats.items():
+            h=int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "little")
+            v[h % DIM]+=(1.0+math.log(tf)) * (1 if (h>>63)&1 else -1)
+        n=math.sqrt(sum(x*x for x in v)) or 1.0
+        out.append([x/n for x in v])
+    return out
+
+def backend_id()->str:
+    """Identifica qué construyó los vectores (se guarda en la metadata de la colección)."""
+    if BACKEND=="local":   return f"local:{os.path.basename(os.path.normpath(LOCAL_PATH))}"
+    if BACKEND=="hashing": return f"hashing:{DIM}"
+    return f"remote:{MODEL}"
+
+def embedding_dim()->int:
+    if BACKEND=="local": return int(_get_local_model().get_sentence_embedding_dimension())
+    return DIM   # Cohere v3 multilingual = 1024
+
+def index_meta()->dict:
+    return {"backend":backend_id(), "dim":embedding_dim()}
+
+def _compute(texts:list[str])->list[list[float]]:
+    if BACKEND=="local": return _embed_local(texts)
+    if BACKEND=="hashing": return _embed_hashing(texts)
+    if BACKEND!="remote": raise ValueError(f"EMBED_BACKEND desconocido: {BACKEND}")
+    return _embed_remote(texts)
+
 def embed(texts:list[str])->list[list[float]]:
-    r=requests.post(f"{BASE}/inference/embeddings",
-        headers=HEADERS, json={"model":MODEL,"input":texts}, timeout=60)
-    r.raise_for_status()
-    return [row["embedding"] for row in r.json()["data"]]
+    # hashing es más barato que consultar la caché
+    if not CACHE_ON or BACKEND=="hashing":
+        return _compute(texts)
+    bid=backend_id()
+    keys=[_cache.key(bid,t) for t in texts]
+    out=_cache.get_many(keys)
+    todo={}   # textos únicos sin caché, en orden de aparición
+    for k,t,v in zip(keys,texts,out):
+        if v is None: todo.setdefault(k,t)
+    if todo:
+        vecs=_compute(list(todo.values()))
+        _cache.put_many(list(todo), vecs)
+        got=dict(zip(todo, vecs))
+        out=[v if v is not None else got[k] for k,v in zip(keys,out)]
+    return out
+
+# --- API asíncrona con coalescencia de requests ---
+WINDOW_MS=float(os.getenv("EMBED_COALESCE_MS",10))
+COALESCE_MAX=int(os.getenv("EMBED_COALESCE_MAX",MAX_BATCH))
+
+class EmbedCoalescer:
+    """
+    Junta los textos que llegan dentro de `window_ms` (o hasta `max_items`) de distintas
+    corutinas y los resuelve con UNA llamada a embed(); cada caller recibe su vector.
+    Vive en un event loop; usar aembed()/aembed_one() para la instancia por defecto.
+    """
+    def __init__(self, window_ms:float|None=None, max_items:int|None=None):
+        self.window=(WINDOW_MS if window_ms is None else window_ms)/1000
+        self.max_items=max_items or COALESCE_MAX
+        self.pending:list[tuple[str,asyncio.Future]]=[]
+        self.timer:asyncio.TimerHandle|None=None
+        self.tasks:set[asyncio.Task]=set()   # referencia fuerte hasta que terminen (si no, el GC puede cortarlas)
+        self.flushes=0
+
+    async def embed_one(self, text:str)->list[float]:
+        loop=asyncio.get_running_loop()
+        fut=loop.create_future()
+        self.pending.append((text,fut))
+        if len(self.pending) >= self.max_items:
+            self._flush()
+        elif self.timer is None:
+            self.timer=loop.call_later(self.window, self._flush)
+        return await fut
+
+    async def embed(self, texts:list[str])->list[list[float]]:
+        return list(await asyncio.gather(*(self.embed_one(t) for t in texts)))
+
+    def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel(); self.timer=None
+        batch, self.pending = self.pending, []
+        if batch:
+            self.flushes+=1
+            task=asyncio.get_running_loop().create_task(self._resolve(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _resolve(self, batch):
+        try:
+            vecs=await asyncio.to_thread(embed, [t for t,_ in batch])   # caché + batches + reintentos
+        except Exception as e:
+            for _,f in batch:
+                if not f.done(): f.set_exception(e)
+            return
+        for (_,f),v in zip(batch,vecs):
+            if not f.done(): f.set_result(v)
+
+_coalescers=weakref.WeakKeyDictionary()   # uno por event loop
+
+def _default_coalescer()->EmbedCoalescer:
+    loop=asyncio.get_running_loop()
+    c=_coalescers.get(loop)
+    if c is None: c=_coalescers[loop]=EmbedCoalescer()
+    return c
+
+async def aembed_one(text:str)->list[float]:
+    return await _default_coalescer().embed_one(text)
+
+async def aembed(texts:list[str])->list[list[float]]:
+    return await _default_coalescer().embed(texts)
 
 if __name__=="__main__":
     vec=embed(["hola mundo"])
-    print("dim:",len(vec[0]))  # ~1024 con Cohere v3 multi
\ No newline at end of file
+    print(backend_id(), "dim:",len(vec[0]))  # ~1024 con Cohere v3 multi
+    print("caché:", cache_stats())
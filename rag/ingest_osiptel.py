@@ -1,16 +1,19 @@
 # rag/ingest_osiptel.py
-import uuid, requests, datetime as dt
-from io import BytesIO
-from markitdown import MarkItDown
-from qdrant_client.models import PointStruct
-from .embed_client import embed
-from .qdrant_init import ensure_collection
+import os, json, time, uuid, hashlib, argparse, datetime as dt
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from qdrant_client.models import PointStruct, PointIdsList
+from .embed_client import embed, index_meta
+from .qdrant_init import (ensure_collection, bump_collection_version, write_index_meta, stored_snippet_chars,
+                          SNIPPET_CHARS)
 from .read_links import read_csv  # o read_txt
+from utils.web_cache import get_markdown
+from utils.html_md import pool_convert
 
-def html_to_md(url:str)->str:
-    html=requests.get(url,timeout=60).content
-    md=MarkItDown().convert_stream(BytesIO(html), extension=".html")
-    return md.text_content
+def html_to_md(url:str, convert=None)->str:
+    # HTML y Markdown salen de la caché local (utils/web_cache) si la página no cambió
+    return get_markdown(url, convert=convert)
 
 def chunk(md:str, min_len=400, max_len=900):
     parts=[]; cur=[]
@@ -37,27 +40,158 @@ def chunk(md:str, min_len=400, max_len=900):
     if buf: merged.append(buf)
     return merged
 
-def ingest(collection="osiptel_news"):
-    c=ensure_collection(collection, dim=1024)
+def _sha(text:str)->str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def point_id(url:str, text:str)->str:
+    """ID determinístico (UUIDv5) a partir de URL + contenido del chunk."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{url}#{_sha(text)}"))
+
+def _existing(c, collection:str)->dict:
+    """{url: {point_id: doc_hash}} de lo que ya está indexado (un solo scroll)."""
+    out, offset = {}, None
+    while True:
+        pts, offset = c.scroll(collection_name=collection, limit=1000, offset=offset,
+                               with_payload=["url","doc_hash"], with_vectors=False)
+        for p in pts:
+            out.setdefault(p.payload.get("url",""), {})[str(p.id)] = p.payload.get("doc_hash")
+        if offset is None: return out
+
+def _process(it, prev:dict, convert=None):
+    """
+    Fetch → Markdown → chunks → embeddings de un link (corre en un worker).
+    prev: {point_id: doc_hash} ya indexados para esta URL. Solo se embeben los chunks nuevos.
+    """
+    md=html_to_md(it.url, convert)
+    h=_sha(md)
+    if prev and all(v==h for v in prev.values()):
+        return it, h, None, [], [], []        # página sin cambios: cero embeddings
+    ids={}
+    for text in chunk(md):
+        ids.setdefault(point_id(it.url, text), text)
+    new=[(pid,text) for pid,text in ids.items() if pid not in prev]
+    vecs=embed([t for _,t in new]) if new else []
+    keep=[pid for pid in ids if pid in prev]
+    stale=[pid for pid in prev if pid not in ids]
+    return it, h, new, vecs, keep, stale
+
+def _checkpoint_path(collection:str)->Path:
+    return Path("data")/f"ingest_checkpoint_{collection}.json"
+
+def _load_checkpoint(path:Path)->set:
+    if not path.exists(): return set()
+    return set(json.loads(path.read_text(encoding="utf-8")).get("done", []))
+
+def _save_checkpoint(path:Path, done:set):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp=path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"done":sorted(done)}, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)   # escritura atómica
+
+def _record_snippet_chars(c, collection):
+    """
+    Largo de payload.snippet en la metadata del índice (el que usa retrieve). Si ya hay puntos se
+    guarda el mínimo entre corridas; si hay puntos sin largo registrado no se registra (retrieve usa text).
+    """
+    prev=stored_snippet_chars(c, collection)
+    if prev is None and c.count(collection_name=collection, exact=True).count:
+        return
+    n=SNIPPET_CHARS if prev is None else min(prev, SNIPPET_CHARS)
+    if n!=prev:
+        write_index_meta(c, collection, {"snippet_chars": n})
+
+def ingest(collection="osiptel_news", workers:int|None=None, batch_size:int|None=None,
+           resume:bool=True, convert_procs:int|None=None):
+    """
+    Ingesta incremental: IDs determinísticos por (url, chunk) y hash de contenido por URL
+    (payload.doc_hash). Páginas sin cambios se saltan; de las cambiadas se upsertean solo los
+    chunks nuevos y se borran los que desaparecieron.
+    workers: links procesados en paralelo (fetch + conversión + embeddings se solapan
+    entre items). 1 = modo secuencial. Por defecto INGEST_WORKERS o 4.
+    batch_size: puntos por upsert (default INGEST_BATCH_SIZE o 64). Como mucho hay
+    2*workers links en vuelo + un batch en memoria. Tras cada batch se guarda un checkpoint
+    con las URLs terminadas; si la corrida se cae, la siguiente (resume=True) continúa desde ahí.
+    convert_procs: procesos para HTML→Markdown (default INGEST_CONVERT_PROCS o 0 = en el hilo
+    del worker). Con >0 la conversión sale del GIL y se reparte entre núcleos.
+    """
+    workers=max(1, int(workers or os.getenv("INGEST_WORKERS", 4)))
+    batch_size=max(1, int(batch_size or os.getenv("INGEST_BATCH_SIZE", 64)))
+    if convert_procs is None: convert_procs=int(os.getenv("INGEST_CONVERT_PROCS", 0))
+    convert=pool_convert(convert_procs) if convert_procs > 0 else None
+    meta=index_meta()
+    c=ensure_collection(collection, dim=meta["dim"], index_meta=meta)
+    _record_snippet_chars(c, collection)
     items=read_csv("data/raw_links.csv")  # o read_txt(...)
-    points=[]
-    for it in items:
-        md=html_to_md(it.url)
-        chunks=chunk(md)
-        vecs=embed(chunks)
-        today=dt.date.today().isoformat()
-        for text,v in zip(chunks,vecs):
-            points.append(PointStruct(
-                id=uuid.uuid4().hex,
-                vector=v,
-                payload={
-                    "text":text, "url":it.url,
-                    "date":it.date, "period":it.period,
-                    "period_type":"mensual", "indexed_at":today
-                }
-            ))
-    c.upsert(collection_name=collection, points=points)
-    print("ingresados:", len(points))
+    ckpt=_checkpoint_path(collection)
+    done=_load_checkpoint(ckpt) if resume else set()
+    todo=[it for it in items if it.url not in done]
+    if done: print(f"checkpoint: {len(items)-len(todo)} links ya ingeridos, se continúa con {len(todo)}")
+    existing=_existing(c, collection)
+    today=dt.date.today().isoformat()
+    t0=time.perf_counter()
+    stats={"new":0, "del":0, "skip":0}
+    buf=[]; ops=[]; waiting=[]   # puntos, (keep, stale, hash) y URLs pendientes del próximo flush
+
+    def flush():
+        # orden: upsert → refrescar hash → borrar; si se cae a mitad, el rerun vuelve a ver la URL como cambiada
+        if buf:
+            c.upsert(collection_name=collection, points=buf)
+            stats["new"]+=len(buf)
+        for keep,stale,h in ops:
+            if keep:   # chunks idénticos de una página modificada: solo refrescar el hash
+                c.set_payload(collection_name=collection, points=keep,
+                              payload={"doc_hash":h, "indexed_at":today})
+            if stale:
+                c.delete(collection_name=collection, points_selector=PointIdsList(points=stale))
+                stats["del"]+=len(stale)
+        if ops:   # la colección cambió: invalida cachés de retrieval (rag/retrieve)
+            bump_collection_version(c, collection)
+        done.update(waiting)
+        _save_checkpoint(ckpt, done)
+        buf.clear(); ops.clear(); waiting.clear()
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        pending=deque(); feed=iter(todo)
+        def fill():
+            while len(pending) < 2*workers:
+                it=next(feed, None)
+                if it is None: return
+                pending.append(ex.submit(_process, it, existing.get(it.url, {}), convert))
+        fill()
+        while pending:
+            it,h,new,vecs,keep,stale=pending.popleft().result()
+            fill()
+            waiting.append(it.url)
+            if new is None:
+                stats["skip"]+=1
+            else:
+                for (pid,text),v in zip(new,vecs):
+                    buf.append(PointStruct(
+                        id=pid,
+                        vector=v,
+                        payload={
+                            "text":text, "snippet":text[:SNIPPET_CHARS], "url":it.url,
+                            "date":it.date, "period":it.period,
+                            "period_type":"mensual", "indexed_at":today,
+                            "doc_hash":h,
+                        }
+                    ))
+                ops.append((keep, stale, h))
+            if len(buf) >= batch_size:
+                flush()
+    flush()
+    ckpt.unlink(missing_ok=True)   # corrida completa: la próxima empieza de cero
+    secs=time.perf_counter()-t0
+    print(f"ingresados: {stats['new']} chunks nuevos, {stats['del']} borrados, {stats['skip']} links sin cambios "
+          f"de {len(todo)} en {secs:.1f}s ({len(todo)/secs if secs else 0:.2f} items/s, workers={workers})")
 
 if __name__=="__main__":
-    ingest()
+    ap=argparse.ArgumentParser(description="Ingesta de notas OSIPTEL en Qdrant.")
+    ap.add_argument("--collection", default="osiptel_news")
+    ap.add_argument("--workers", type=int, default=None, help="Links en paralelo (default INGEST_WORKERS o 4).")
+    ap.add_argument("--batch-size", type=int, default=None, help="Puntos por upsert (default INGEST_BATCH_SIZE o 64).")
+    ap.add_argument("--restart", action="store_true", help="Ignora el checkpoint de una corrida interrumpida.")
+    ap.add_argument("--convert-procs", type=int, default=None, help="Procesos para HTML→Markdown (0 = en hilo).")
+    args=ap.parse_args()
+    ingest(args.collection, workers=args.workers, batch_size=args.batch_size, resume=not args.restart,
+           convert_procs=args.convert_procs)
@@ -0,0 +1,170 @@
+# rag/np_index.py
+"""
+Motor de retrieval alternativo: top-k coseno exacto con NumPy sobre una matriz .npy
+memory-mapped + payload columnar (un JSON por campo). Para cientos/miles de chunks es más
+rápido que levantar Qdrant en modo local en cada corrida.
+
+    python -m rag.np_index --collection osiptel_news                   # exporta desde Qdrant
+    RETRIEVE_ENGINE=numpy python run_news.py ...                        # lo usa retrieve()
+
+--dtype float32 (default) puntúa directo sobre el memmap con BLAS. --dtype float16 ocupa la mitad
+en disco y en page cache, pero no tiene BLAS: cada consulta sube el memmap a float32 por bloques
+de NP_SCORE_BLOCK filas (memoria acotada, sin copia completa) y es varias veces más lenta.
+"""
+from __future__ import annotations
+import os, json, argparse, threading
+from pathlib import Path
+import numpy as np
+
+INDEX_DIR = Path(os.getenv("NP_INDEX_DIR", "data/np_index"))
+SCORE_BLOCK = int(os.getenv("NP_SCORE_BLOCK", 4096))
+COLUMNS = ("text", "snippet", "url", "date", "period", "period_type")
+
+def index_path(collection: str) -> Path:
+    return INDEX_DIR/collection
+
+def export_collection(collection: str = "osiptel_news", outdir: str | Path | None = None,
+                      dtype: str = "float32") -> Path:
+    """Vuelca vectores (normalizados) y payload de una colección Qdrant al formato columnar."""
+    from .qdrant_init import get_client, read_index_meta, SNIPPET_CHARS
+    c = get_client()
+    ids, vecs, cols, offset = [], [], {k: [] for k in COLUMNS}, None
+    while True:
+        pts, offset = c.scroll(collection_name=collection, limit=512, offset=offset,
+                               with_payload=[k for k in COLUMNS if k != "snippet"], with_vectors=True)
+        for p in pts:
+            ids.append(str(p.id)); vecs.append(p.vector)
+            for k in COLUMNS: cols[k].append(p.payload.get(k) or "")
+            # se recorta de text: payload.snippet puede venir de una ingesta con otro SNIPPET_CHARS
+            cols["snippet"][-1] = cols["text"][-1][:SNIPPET_CHARS]
+        if offset is None: break
+    X = np.asarray(vecs, dtype=np.float32).reshape(len(vecs), -1)
+    X /= np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+    out = Path(outdir) if outdir else index_path(collection)
+    out.mkdir(parents=True, exist_ok=True)
+    np.save(out/"vectors.npy", X.astype(dtype))
+    for k, vals in cols.items():
+        (out/f"col_{k}.json").write_text(json.dumps(vals, ensure_ascii=False), encoding="utf-8")
+    (out/"ids.json").write_text(json.dumps(ids), encoding="utf-8")
+    im = read_index_meta(c, collection) or {}
+    meta = {"collection": collection, "n": len(ids), "dim": int(X.shape[1]) if len(ids) else 0,
+            "dtype": dtype, "columns": list(COLUMNS), "snippet_chars": SNIPPET_CHARS, "index_meta": im, "version": int(im.get("version", 0))}
+    (out/"meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    return out
+
+class NpIndex:
+    """Índice en memoria (mmap). Columnas y máscaras de filtro se cargan/calculan bajo demanda."""
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path/"meta.json").read_text(encoding="utf-8"))
+        self.vectors = np.load(self.path/"vectors.npy", mmap_mode="r")
+        self._cols: dict[str, np.ndarray] = {}
+        self._masks: dict[tuple, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self): return self.meta["n"]
+
+    def scores(self, q: np.ndarray) -> np.ndarray:
+        """X @ q (q float32). float16 se sube a float32 por bloques de SCORE_BLOCK filas."""
+        X = self.vectors
+        if X.dtype == np.float32:
+            return X @ q
+        out = np.empty(len(X), dtype=np.float32)
+        buf = np.empty((min(SCORE_BLOCK, len(X)), X.shape[1]), dtype=np.float32)
+        for i in range(0, len(X), SCORE_BLOCK):
+            b = buf[:len(X) - i] if i + SCORE_BLOCK > len(X) else buf
+            np.copyto(b, X[i:i+len(b)])
+            np.matmul(b, q, out=out[i:i+len(b)])
+        return out
+
+    def column(self, name: str) -> np.ndarray:
+        col = self._cols.get(name)
+        if col is None:
+            with self._lock:
+                vals = json.loads((self.path/f"col_{name}.json").read_text(encoding="utf-8"))
+                col = self._cols[name] = np.asarray(vals, dtype=object if name in ("text", "snippet") else str)
+        return col
+
+    def _eq_mask(self, name: str, value: str) -> np.ndarray:
+        key = (name, value)
+        m = self._masks.get(key)
+        if m is None:
+            m = self._masks[key] = self.column(name) == value
+        return m
+
+    def mask(self, period_type=None, date=None, date_from=None, date_to=None) -> np.ndarray | None:
+        """Máscara booleana de filas que pasan el filtro (None = sin filtro). Fechas ISO inclusive."""
+        m = None
+        if date:
+            m = self._eq_mask("date", date)
+        if date_from or date_to:
+            d = self.column("date")
+            r = np.ones(len(d), dtype=bool)
+            if date_from: r &= d >= date_from
+            if date_to: r &= d <= date_to
+            m = r if m is None else m & r
+        if period_type:
+            pm = self._eq_mask("period_type", period_type)
+            m = pm if m is None else m & pm
+        return m
+
+    def query(self, vec=None, k: int = 3, group_by_url: bool = False, **flt) -> list[int]:
+        """
+        Índices de fila del top-k. Con vec: coseno exacto (argpartition); sin vec: primeras
+        filas que pasan el filtro. group_by_url: como mucho un chunk por URL.
+        """
+        m = self.mask(**flt)
+        if vec is None:
+            rows = np.flatnonzero(m) if m is not None else np.arange(len(self))
+        else:
+            q = np.asarray(vec, dtype=np.float32)
+            q /= max(float(np.linalg.norm(q)), 1e-12)
+            scores = self.scores(q)
+            if m is not None: scores = np.where(m, scores, -np.inf)
+            n = len(scores) if group_by_url else min(k, len(scores))
+            if n <= 0: return []
+            top = np.argpartition(-scores, n-1)[:n] if n < len(scores) else np.arange(len(scores))
+            rows = top[np.argsort(-scores[top], kind="stable")]
+            rows = rows[np.isfinite(scores[rows])]
+        if not group_by_url:
+            return rows[:k].tolist()
+        urls, seen, out = self.column("url"), set(), []
+        for r in rows:
+            u = urls[r]
+            if u in seen: continue
+            seen.add(u); out.append(int(r))
+            if len(out) == k: break
+        return out
+
+    def rows(self, idx: list[int], max_chars: int = 600, text_col: str | None = None) -> list[dict]:
+        # col_snippet.json es mucho más liviano que col_text.json: se usa si alcanza para max_chars
+        if text_col is None:
+            snip = "snippet" in self.meta.get("columns", ()) and max_chars <= self.meta.get("snippet_chars", 0)
+            text_col = "snippet" if snip else "text"
+        text, url, date = self.column(text_col), self.column("url"), self.column("date")
+        return [{"text": (text[i] or "")[:max_chars], "url": str(url[i]), "date": str(date[i])} for i in idx]
+
+_cache: dict[str, tuple[float, NpIndex]] = {}
+_cache_lock = threading.Lock()
+
+def load_index(collection: str = "osiptel_news") -> NpIndex:
+    """Índice del proceso (se recarga si se re-exportó, según mtime de meta.json)."""
+    p = index_path(collection)
+    if not (p/"meta.json").exists():
+        raise FileNotFoundError(f"[np_index] no existe {p}; exporta con: python -m rag.np_index --collection {collection}")
+    mtime = (p/"meta.json").stat().st_mtime
+    with _cache_lock:
+        hit = _cache.get(collection)
+        if hit is None or hit[0] != mtime:
+            hit = _cache[collection] = (mtime, NpIndex(p))
+        return hit[1]
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Exporta una colección Qdrant al índice NumPy.")
+    ap.add_argument("--collection", default="osiptel_news")
+    ap.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    ap.add_argument("--out", default=None)
+    args = ap.parse_args()
+    out = export_collection(args.collection, args.out, args.dtype)
+    meta = json.loads((out/"meta.json").read_text(encoding="utf-8"))
+    print(f"exportado: {meta['n']} puntos x {meta['dim']} dims ({args.dtype}) -> {out}")
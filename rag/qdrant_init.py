@@ -1,25 +1,246 @@
-import os
+import os, uuid, atexit, threading
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
+from qdrant_client.models import (Distance, VectorParams, PointStruct, HnswConfigDiff, PayloadSchemaType,
+                                  ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+                                  BinaryQuantization, BinaryQuantizationConfig,
+                                  SearchParams, QuantizationSearchParams)
 
-def ensure_collection(name="osiptel_news", dim=1024):
-    local_path = os.getenv("QDRANT_LOCAL_PATH")  # p.ej. "./qdrant_data"
-    url = os.getenv("QDRANT_URL")
+META_ID = 1   # único punto de la colección "<name>__meta"
+# Backend de las colecciones creadas antes de guardar metadata (índice original con Cohere v3)
+LEGACY_BACKEND = f"remote:{os.getenv('EMBEDDING_MODEL', 'cohere/Cohere-embed-v3-multilingual')}"
 
+# Largo del campo `snippet` (prefijo de `text`) que guarda la ingesta; queda registrado en la
+# metadata del índice (snippet_chars) y retrieve pide solo ese campo cuando max_chars <= ese valor
+# en vez de traer el chunk completo.
+SNIPPET_CHARS = int(os.getenv("SNIPPET_CHARS", 600))
+
+# Índices de payload usados por los filtros de rag/retrieve (date como datetime para rangos)
+PAYLOAD_INDEXES = {
+    "date": PayloadSchemaType.DATETIME,
+    "period": PayloadSchemaType.KEYWORD,
+    "period_type": PayloadSchemaType.KEYWORD,
+    "url": PayloadSchemaType.KEYWORD,
+}
+
+# --- Cliente compartido por proceso (ingesta y retrieve) ---
+_client: QdrantClient | None = None
+_client_key = None
+_client_lock = threading.Lock()
+
+def _connection_key():
+    return os.getenv("QDRANT_LOCAL_PATH"), os.getenv("QDRANT_URL")
+
+def is_local_mode() -> bool:
+    """True si Qdrant corre embebido en el proceso (path o :memory:), sin servidor."""
+    local_path, url = _connection_key()
+    return bool(local_path) or not url
+
+def _connect(local_path, url) -> QdrantClient:
     if local_path:
-        client = QdrantClient(path=local_path)     # persistente en disco
+        return QdrantClient(path=local_path)     # persistente en disco
     elif url:
-        client = QdrantClient(url=url)             # servidor remoto/local
-    else:
-        client = QdrantClient(":memory:")          # rápido para pruebas
+        return QdrantClient(url=url)             # servidor remoto/local
+    return QdrantClient(":memory:")              # rápido para pruebas
+
+def _closed(client: QdrantClient) -> bool:
+    """True si alguien cerró el cliente compartido (QdrantLocal marca _closed en close())."""
+    return bool(getattr(getattr(client, "_client", None), "_closed", False))
+
+def get_client() -> QdrantClient:
+    """
+    Cliente Qdrant único del proceso, creado al primer uso (thread-safe). En modo path evita
+    reabrir qdrant_data en cada consulta; en modo URL reutiliza el pool HTTP. Si cambian
+    QDRANT_LOCAL_PATH/QDRANT_URL, o un llamador cerró el cliente, se reconecta.
+    """
+    global _client, _client_key
+    key = _connection_key()
+    if _client is not None and _client_key == key and not _closed(_client):
+        return _client
+    with _client_lock:
+        if _client is None or _client_key != key or _closed(_client):
+            if _client is not None: _client.close()
+            _client, _client_key = _connect(*key), key
+        return _client
+
+def client_healthy() -> bool:
+    """True si el cliente responde (listar colecciones); si no responde, reintenta con uno nuevo."""
+    for attempt in range(2):
+        try:
+            get_client().get_collections()
+            return True
+        except Exception:
+            if attempt == 0:
+                close_client()
+    return False
+
+def warmup(collection: str = "osiptel_news") -> bool:
+    """Abre la conexión y carga la colección antes de la primera consulta; reconecta si no responde."""
+    if not client_healthy():
+        close_client()
+    c = get_client()
+    if c.collection_exists(collection):
+        c.count(collection_name=collection, exact=False)
+        return True
+    return False
+
+@atexit.register
+def close_client():
+    global _client, _client_key
+    with _client_lock:
+        if _client is not None:
+            try: _client.close()
+            finally: _client, _client_key = None, None
+
+def _meta_name(name): return f"{name}__meta"
+
+def _env_bool(key):
+    v = os.getenv(key)
+    return None if v is None else v.lower() in ("1", "true", "yes")
+
+def _env_int(key):
+    v = os.getenv(key)
+    return int(v) if v else None
+
+def quantization_config(kind: str | None):
+    """'int8' (scalar, 4x menos RAM) | 'binary' (32x, para dims altas como 1024) | None."""
+    kind = (kind or "none").lower()
+    if kind == "none":
+        return None
+    if kind in ("int8", "scalar"):
+        return ScalarQuantization(scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True))
+    if kind == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    raise ValueError(f"[qdrant] cuantización desconocida: {kind} (none|int8|binary)")
+
+def search_params(hnsw_ef: int | None = None) -> SearchParams | None:
+    """Búsqueda sobre vectores cuantizados + re-score con los originales (sin efecto si no hay cuantización)."""
+    if is_local_mode():
+        return None   # modo local: búsqueda exacta, qdrant-client ignora (y advierte) los parámetros
+    return SearchParams(
+        hnsw_ef=hnsw_ef or _env_int("QDRANT_HNSW_EF_SEARCH"),
+        quantization=QuantizationSearchParams(
+            rescore=True, oversampling=float(os.getenv("QDRANT_OVERSAMPLING", 2.0))),
+    )
+
+# Última metadata leída/escrita por colección (la refresca cada read_index_meta, p. ej. la lectura
+# de versión de la caché de retrieve)
+_meta_cache: dict = {}
+
+def read_index_meta(client, name="osiptel_news") -> dict | None:
+    """Metadata del índice (backend de embeddings, dim, ...) guardada junto a la colección."""
+    mn = _meta_name(name)
+    meta = None
+    if client.collection_exists(mn):
+        pts = client.retrieve(collection_name=mn, ids=[META_ID], with_payload=True)
+        meta = dict(pts[0].payload) if pts else None
+    _meta_cache[(_connection_key(), name)] = meta
+    return meta
+
+def stored_snippet_chars(client, name="osiptel_news") -> int | None:
+    """Largo de payload.snippet con que se ingestó la colección (None: no registrado, usar `text`)."""
+    key = (_connection_key(), name)
+    meta = _meta_cache[key] if key in _meta_cache else read_index_meta(client, name)
+    v = (meta or {}).get("snippet_chars")
+    return int(v) if v is not None else None
+
+def write_index_meta(client, name="osiptel_news", meta: dict | None = None):
+    """Mezcla `meta` en la metadata existente (colección auxiliar con un único punto)."""
+    mn = _meta_name(name)
+    if not client.collection_exists(mn):
+        client.create_collection(collection_name=mn,
+                                 vectors_config=VectorParams(size=1, distance=Distance.DOT))
+    cur = read_index_meta(client, name) or {}
+    cur.update(meta or {})
+    client.upsert(collection_name=mn, points=[PointStruct(id=META_ID, vector=[0.0], payload=cur)])
+    _meta_cache[(_connection_key(), name)] = dict(cur)
+    return cur
+
+def collection_version(client, name="osiptel_news") -> int:
+    """Contador que la ingesta incrementa cada vez que cambia la colección (invalida cachés)."""
+    return int((read_index_meta(client, name) or {}).get("version", 0))
+
+def collection_identity(client, name="osiptel_news") -> dict | None:
+    """
+    Qué colección es (ubicación QDRANT_LOCAL_PATH/QDRANT_URL + uid creado con ella) y su versión;
+    None si no tiene metadata (sin versión: no se puede cachear de forma segura).
+    """
+    meta = read_index_meta(client, name)
+    if not meta:
+        return None
+    return {"where": list(_connection_key()), "uid": meta.get("uid"), "version": int(meta.get("version", 0))}
+
+def bump_collection_version(client, name="osiptel_news") -> int:
+    v = collection_version(client, name) + 1
+    write_index_meta(client, name, {"version": v})
+    return v
+
+def check_index_meta(client, name: str, expected: dict):
+    """ValueError si el índice fue construido con otro backend/dimensión que el configurado."""
+    size = client.get_collection(name).config.params.vectors.size
+    if expected.get("dim") is not None and size != expected["dim"]:
+        raise ValueError(f"[qdrant] '{name}' tiene vectores de {size} dims; el backend "
+                         f"'{expected.get('backend')}' produce {expected['dim']}. Reindexa o cambia EMBED_BACKEND.")
+    meta = read_index_meta(client, name) or {}
+    built = meta.get("backend")
+    if not built and client.count(collection_name=name, exact=True).count:
+        # puntos indexados antes de registrar metadata: los construyó el backend remoto (Cohere)
+        built = LEGACY_BACKEND
+    if built and expected.get("backend") and built != expected["backend"]:
+        origin = "" if meta.get("backend") else " (sin metadata: se asume el backend original)"
+        raise ValueError(f"[qdrant] '{name}' fue indexada con '{built}'{origin} y ahora se usa "
+                         f"'{expected['backend']}'. Reindexa o cambia EMBED_BACKEND.")
+    return meta
+
+def ensure_payload_indexes(client, name="osiptel_news"):
+    """Crea los índices de PAYLOAD_INDEXES que falten (en modo local no existen: se omite)."""
+    if is_local_mode():
+        return
+    have = client.get_collection(name).payload_schema or {}
+    for field, schema in PAYLOAD_INDEXES.items():
+        if field not in have:
+            client.create_payload_index(collection_name=name, field_name=field, field_schema=schema, wait=True)
+
+def ensure_collection(name="osiptel_news", dim=1024, index_meta: dict | None = None,
+                      quantization: str | None = None, on_disk: bool | None = None,
+                      on_disk_payload: bool | None = None, hnsw_m: int | None = None,
+                      hnsw_ef_construct: int | None = None):
+    """
+    Abre Qdrant y crea la colección si no existe. Opciones de almacenamiento (solo al crear;
+    por defecto desde QDRANT_QUANTIZATION, QDRANT_ON_DISK, QDRANT_ON_DISK_PAYLOAD,
+    QDRANT_HNSW_M, QDRANT_HNSW_EF_CONSTRUCT):
+    - quantization: 'int8' | 'binary' | None; los cuantizados quedan en RAM y se re-puntúa
+      con los originales (ver search_params()).
+    - on_disk / on_disk_payload: vectores originales y payload en disco (mmap).
+    - hnsw_m / hnsw_ef_construct: parámetros del grafo HNSW.
+    """
+    client = get_client()   # QDRANT_LOCAL_PATH (p.ej. "./qdrant_data") o QDRANT_URL o :memory:
 
     if not client.collection_exists(name):
+        quantization = quantization if quantization is not None else os.getenv("QDRANT_QUANTIZATION")
+        on_disk = on_disk if on_disk is not None else _env_bool("QDRANT_ON_DISK")
+        on_disk_payload = on_disk_payload if on_disk_payload is not None else _env_bool("QDRANT_ON_DISK_PAYLOAD")
+        hnsw_m = hnsw_m if hnsw_m is not None else _env_int("QDRANT_HNSW_M")     # m=0: sin grafo HNSW
+        hnsw_ef_construct = hnsw_ef_construct if hnsw_ef_construct is not None else _env_int("QDRANT_HNSW_EF_CONSTRUCT")
+        hnsw = (HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct)
+                if hnsw_m is not None or hnsw_ef_construct is not None else None)
         client.create_collection(
             collection_name=name,
-            vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+            vectors_config=VectorParams(size=dim, distance=Distance.COSINE, on_disk=on_disk),
+            quantization_config=quantization_config(quantization),
+            on_disk_payload=on_disk_payload,
+            hnsw_config=hnsw,
         )
+        # identidad de esta colección (la caché de retrieve no confunde otra con el mismo nombre)
+        write_index_meta(client, name, {"uid": uuid.uuid4().hex})
+        if index_meta is not None:
+            index_meta = {**index_meta, "quantization": (quantization or "none").lower()}
+    ensure_payload_indexes(client, name)
+    if index_meta:
+        meta = check_index_meta(client, name, index_meta)
+        if not meta.get("backend"):   # colección nueva o indexada antes de registrar metadata
+            write_index_meta(client, name, index_meta)
     return client
 
 if __name__ == "__main__":
-    ensure_collection()
-    print("Qdrant listo.")
\ No newline at end of file
+    c = ensure_collection()
+    print("Qdrant listo.", read_index_meta(c))
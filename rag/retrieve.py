@@ -1,82 +1,340 @@
 # rag/retrieve.py
-import os, datetime as dt
-from qdrant_client import QdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue, ScoredPoint
-from .embed_client import embed
+import os, json, time, sqlite3, asyncio, hashlib, threading, datetime as dt
+from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from qdrant_client.models import Filter, FieldCondition, MatchValue, MatchAny, DatetimeRange, ScoredPoint
+from .embed_client import embed, aembed_one, index_meta, backend_id
+from .qdrant_init import (check_index_meta, search_params, get_client, is_local_mode, collection_identity,
+                          stored_snippet_chars)
+from . import np_index
 
 def _client():
-    local_path = os.getenv("QDRANT_LOCAL_PATH")
-    url = os.getenv("QDRANT_URL")
-    if local_path:
-        return QdrantClient(path=local_path)   # persistente en disco
-    elif url:
-        return QdrantClient(url=url)           # servidor remoto/local
-    return QdrantClient(":memory:")            # pruebas
+    return get_client()   # compartido con qdrant_init (un solo cliente por proceso)
 
-def retrieve(query: str, k: int = 3, collection: str = "osiptel_news",
-             period_type: str | None = None, max_chars: int = 600):
-    """Devuelve [{'text':..., 'url':...}, ...] desde Qdrant."""
-    client = _client()
-    vec = embed([query])[0]  # 1024-dim con Cohere v3 multilingual
-    flt = None
+_checked = set()
+
+def _check_backend(client, collection: str):
+    """Una vez por proceso: el backend de embeddings actual debe ser el que construyó el índice."""
+    if collection in _checked: return
+    check_index_meta(client, collection, index_meta())
+    _checked.add(collection)
+
+def _engine(engine: str | None) -> str:
+    """'qdrant' (default) o 'numpy' (rag/np_index, exportado previamente). Env RETRIEVE_ENGINE."""
+    e = (engine or os.getenv("RETRIEVE_ENGINE", "qdrant")).lower()
+    if e not in ("qdrant", "numpy"):
+        raise ValueError(f"RETRIEVE_ENGINE desconocido: {e} (qdrant|numpy)")
+    return e
+
+def _np(collection: str) -> "np_index.NpIndex":
+    idx = np_index.load_index(collection)
+    built, cur = idx.meta.get("index_meta", {}).get("backend"), index_meta()["backend"]
+    if built and built != cur:
+        raise ValueError(f"[np_index] '{collection}' fue exportado con '{built}' y ahora se usa '{cur}'.")
+    return idx
+
+# --- Caché de resultados: clave (consulta, filtros, k, max_chars, colección, motor, versión) ---
+RESULT_CACHE_PATH = os.getenv("RETRIEVE_CACHE_PATH", "data/cache/retrieval.sqlite")
+RESULT_CACHE_TTL = float(os.getenv("RETRIEVE_CACHE_TTL", 7*24*3600))
+RESULT_CACHE_ON = os.getenv("RETRIEVE_CACHE", "1").lower() not in ("0", "false", "no")
+
+class _ResultCache:
+    def __init__(self, path: str, ttl: float):
+        self.path, self.ttl = path, ttl
+        self.mem: dict[str, tuple[float, str]] = {}
+        self.lock = threading.Lock(); self.db = None
+        self.stats = {"hit": 0, "miss": 0}
+
+    def _conn(self):
+        if self.db is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(self.path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS res (k TEXT PRIMARY KEY, value TEXT, created_at REAL)")
+        return self.db
+
+    def get(self, key: str):
+        with self.lock:
+            hit = self.mem.get(key)
+            if hit is None:
+                row = self._conn().execute("SELECT created_at, value FROM res WHERE k=?", (key,)).fetchone()
+                hit = self.mem[key] = tuple(row) if row else (0.0, "")
+            if hit[1] and time.time() - hit[0] < self.ttl:
+                self.stats["hit"] += 1
+                return json.loads(hit[1])   # copia nueva: el caller puede mutarla
+            self.stats["miss"] += 1
+            return None
+
+    def put(self, key: str, value):
+        now, raw = time.time(), json.dumps(value, ensure_ascii=False)
+        with self.lock:
+            self.mem[key] = (now, raw)
+            db = self._conn()
+            db.execute("INSERT OR REPLACE INTO res (k, value, created_at) VALUES (?,?,?)", (key, raw, now))
+            db.execute("DELETE FROM res WHERE created_at < ?", (now - self.ttl,))
+            db.commit()
+
+_results = _ResultCache(RESULT_CACHE_PATH, RESULT_CACHE_TTL)
+
+def result_cache_stats() -> dict:
+    return dict(_results.stats)
+
+def _cached(kind: str, params: dict, collection: str, engine: str | None, compute):
+    """
+    Devuelve el resultado cacheado o lo calcula. La identidad de la colección (ubicación + uid) y
+    su versión (que la ingesta incrementa) entran en la clave: tras re-ingerir, o apuntando a otro
+    qdrant_data/servidor, las entradas viejas dejan de coincidir. Sin metadata no se cachea.
+    """
+    if not RESULT_CACHE_ON:
+        return compute()
+    e = _engine(engine)
+    if e == "numpy":
+        idx = _np(collection)
+        im = idx.meta.get("index_meta") or {}
+        ident = {"where": str(idx.path.resolve()), "uid": im.get("uid"), "version": idx.meta.get("version", 0)} if im else None
+    else:
+        ident = collection_identity(_client(), collection)
+    if ident is None:
+        return compute()
+    key = hashlib.sha256(json.dumps({"kind": kind, **params, "collection": collection, "engine": e,
+                                     **ident, "backend": backend_id()},
+                                    sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    out = _results.get(key)
+    if out is None:
+        out = compute()
+        _results.put(key, out)
+    return out
+
+def months_back(date_iso: str, n: int) -> str:
+    """'YYYY-MM-DD' n meses antes (día 1). months_back('2025-01-01', 12) -> '2024-01-01'."""
+    d = dt.date.fromisoformat(date_iso[:10])
+    m = d.year*12 + d.month-1 - n
+    return dt.date(m//12, m%12 + 1, 1).isoformat()
+
+def _month_starts(date_from: str, date_to: str) -> list[str]:
+    """'YYYY-MM-01' dentro de [date_from, date_to] (el corpus guarda payload.date como inicio de mes)."""
+    a, b = dt.date.fromisoformat(date_from[:10]), dt.date.fromisoformat(date_to[:10])
+    m = a.year*12 + a.month-1 + (a.day > 1)
+    out = []
+    while m <= b.year*12 + b.month-1:
+        out.append(dt.date(m//12, m%12 + 1, 1).isoformat()); m += 1
+    return out
+
+def _filter(period_type: str | None = None, date: str | None = None,
+            date_from: str | None = None, date_to: str | None = None):
+    """
+    Filtro de payload. Contra un servidor, `date` (exacta) y `date_from`/`date_to` (inclusive) van
+    como rango sobre el índice datetime de payload.date. En modo local (sin índices de payload) un
+    rango parsea la fecha de cada punto en cada consulta: ahí `date` va como MatchValue y una
+    ventana acotada como MatchAny sobre sus meses 'YYYY-MM-01' (comparación de strings).
+    period_type contra su índice keyword.
+    """
+    must = []
+    if is_local_mode() and date:
+        must.append(FieldCondition(key="date", match=MatchValue(value=date)))
+    elif is_local_mode() and date_from and date_to:
+        must.append(FieldCondition(key="date", match=MatchAny(any=_month_starts(date_from, date_to))))
+    else:
+        if date:
+            date_from = date_to = date
+        if date_from or date_to:
+            must.append(FieldCondition(key="date", range=DatetimeRange(gte=date_from, lte=date_to)))
     if period_type:
-        flt = Filter(must=[FieldCondition(key="period_type", match=MatchValue(value=period_type))])
-    hits: list[ScoredPoint] = client.search(collection_name=collection,
-                                            query_vector=vec, limit=k, query_filter=flt)
+        must.append(FieldCondition(key="period_type", match=MatchValue(value=period_type)))
+    return Filter(must=must) if must else None
+
+def _text_key(client, collection: str, max_chars: int) -> str:
+    """'snippet' si el largo con que se ingestó (metadata del índice, no SNIPPET_CHARS actual) alcanza."""
+    n = stored_snippet_chars(client, collection)
+    return "snippet" if n is not None and max_chars <= n else "text"
+
+def _projection(client, collection: str, max_chars: int) -> list[str]:
+    """Claves de payload que se piden a Qdrant (with_payload): nunca el chunk completo si basta el snippet."""
+    return [_text_key(client, collection, max_chars), "url", "date"]
+
+def _rows(client, collection, hits, max_chars) -> list[dict]:
+    """Payload proyectado -> dicts. Puntos ingestados antes del campo 'snippet' se completan con 'text'."""
+    key = _text_key(client, collection, max_chars)
+    missing = [h.id for h in hits if key not in (h.payload or {})]
+    full = {}
+    if missing:
+        full = {p.id: p.payload.get("text", "") for p in
+                client.retrieve(collection_name=collection, ids=missing, with_payload=["text"])}
     out = []
     for h in hits:
-        txt = (h.payload.get("text", "") or "")[:max_chars]
-        out.append({"text": txt, "url": h.payload.get("url", ""), "date": h.payload.get("date","")})
+        txt = (h.payload.get(key) if key in h.payload else full.get(h.id)) or ""
+        out.append({"text": txt[:max_chars], "url": h.payload.get("url", ""), "date": h.payload.get("date","")})
     return out
 
-def _get_by_date(date_iso: str, k: int = 4, collection: str = "osiptel_news", max_chars: int = 600):
+def _search(client, vec, k, collection, period_type, max_chars, date_from=None, date_to=None):
+    flt = _filter(period_type, date_from=date_from, date_to=date_to)
+    hits: list[ScoredPoint] = client.query_points(collection_name=collection, query=vec, limit=k,
+                                                  query_filter=flt, search_params=search_params(),
+                                                  with_payload=_projection(client, collection, max_chars)).points
+    return _rows(client, collection, hits, max_chars)
+
+def retrieve(query: str, k: int = 3, collection: str = "osiptel_news",
+             period_type: str | None = None, max_chars: int = 600,
+             date_from: str | None = None, date_to: str | None = None, engine: str | None = None):
+    """
+    Devuelve [{'text':..., 'url':...}, ...] desde Qdrant (o desde el índice NumPy con engine='numpy').
+    date_from/date_to: 'YYYY-MM-DD' inclusive (p. ej. últimos 13 meses:
+    date_from=months_back(target, 12), date_to=target).
+    Resultados cacheados (RETRIEVE_CACHE_TTL) hasta que la colección cambie de versión.
+    """
+    params = dict(query=query, k=k, period_type=period_type, max_chars=max_chars,
+                  date_from=date_from, date_to=date_to)
+    return _cached("retrieve", params, collection, engine,
+                   lambda: _retrieve(query, k, collection, period_type, max_chars, date_from, date_to, engine))
+
+def _retrieve(query, k, collection, period_type, max_chars, date_from, date_to, engine):
+    if _engine(engine) == "numpy":
+        idx = _np(collection)
+        vec = embed([query])[0]
+        rows = idx.query(vec, k, period_type=period_type, date_from=date_from, date_to=date_to)
+        return idx.rows(rows, max_chars)
+    client = _client()
+    _check_backend(client, collection)
+    vec = embed([query])[0]  # 1024-dim con Cohere v3 multilingual
+    return _search(client, vec, k, collection, period_type, max_chars, date_from, date_to)
+
+async def aretrieve(query: str, k: int = 3, collection: str = "osiptel_news",
+                    period_type: str | None = None, max_chars: int = 600,
+                    date_from: str | None = None, date_to: str | None = None, engine: str | None = None):
+    """
+    Igual que retrieve() pero para llamadas concurrentes (p. ej. varias narrativas a la vez):
+    los embeddings de queries simultáneas se agrupan en una sola request (embed_client.aembed_one).
+    """
+    vec = await aembed_one(query)
+    def _run():
+        if _engine(engine) == "numpy":
+            idx = _np(collection)
+            rows = idx.query(vec, k, period_type=period_type, date_from=date_from, date_to=date_to)
+            return idx.rows(rows, max_chars)
+        client = _client()
+        _check_backend(client, collection)
+        return _search(client, vec, k, collection, period_type, max_chars, date_from, date_to)
+    return await asyncio.to_thread(_run)
+
+def _get_by_date(date_iso: str, k: int = 4, collection: str = "osiptel_news", max_chars: int = 600,
+                 engine: str | None = None):
     """Trae chunks cuyo payload.date == date_iso (exacto)."""
+    if _engine(engine) == "numpy":
+        idx = _np(collection)
+        return idx.rows(idx.query(None, k, date=date_iso), max_chars)
     client = _client()
-    flt = Filter(must=[FieldCondition(key="date", match=MatchValue(value=date_iso))])
+    flt = _filter(date=date_iso)
     # Usamos scroll para traer varios puntos; podemos limitar manualmente
-    points, _ = client.scroll(collection_name=collection, scroll_filter=flt, limit=k)
-    out = []
-    for p in points:
-        txt = (p.payload.get("text", "") or "")[:max_chars]
-        out.append({"text": txt, "url": p.payload.get("url", ""), "date": p.payload.get("date","")})
-    return out
+    points, _ = client.scroll(collection_name=collection, scroll_filter=flt, limit=k,
+                              with_payload=_projection(client, collection, max_chars))
+    return _rows(client, collection, points, max_chars)
 
-def retrieve_for_month(target_month: str, collection: str = "osiptel_news"):
+@dataclass
+class Lookup:
+    """
+    Una consulta de retrieve_many: vector search si hay `query`, y/o filtro por fecha
+    exacta (`date`) o rango inclusive (`date_from`/`date_to`).
+    """
+    query: str | None = None
+    date: str | None = None
+    k: int = 3
+    period_type: str | None = None
+    max_chars: int = 600
+    date_from: str | None = None
+    date_to: str | None = None
+
+def _lookup_filter(l: Lookup):
+    return _filter(l.period_type, l.date, l.date_from, l.date_to)
+
+def retrieve_many(lookups: list[Lookup], collection: str = "osiptel_news",
+                  also_embed: list[str] | None = None, engine: str | None = None) -> list[list[dict]]:
+    """
+    Resuelve varias consultas de una vez:
+    - todas las queries (más `also_embed`, p. ej. fallbacks que quizá se usen después) en UNA
+      llamada a embed();
+    - cada consulta agrupada por URL en el servidor (query_points_groups, 1 chunk por URL),
+      en paralelo contra un servidor; en modo local (embebido, sin red) en secuencia.
+    Devuelve una lista de resultados por lookup, en el mismo orden.
+    """
+    texts = list(dict.fromkeys([l.query for l in lookups if l.query] + list(also_embed or [])))
+    vecs = dict(zip(texts, embed(texts))) if texts else {}
+    if _engine(engine) == "numpy":
+        idx = _np(collection)
+        return [idx.rows(idx.query(vecs.get(l.query), l.k, group_by_url=True, period_type=l.period_type,
+                                   date=l.date, date_from=l.date_from, date_to=l.date_to), l.max_chars)
+                for l in lookups]
+    client = _client()
+    if any(l.query for l in lookups):
+        _check_backend(client, collection)
+    sp = search_params()
+
+    local = is_local_mode()
+
+    def run(l: Lookup):
+        if local and l.query:
+            # embebido no hay servidor que agrupe y query_points_groups local repite búsquedas
+            # (~10x más lento): top-k sobre-muestreado y primer chunk por URL
+            hits = client.query_points(collection_name=collection, query=vecs[l.query],
+                                       query_filter=_lookup_filter(l), limit=l.k*4,
+                                       with_payload=_projection(client, collection, l.max_chars)).points
+            first = {}
+            for h in hits:
+                first.setdefault(h.payload.get("url"), h)
+            hits = list(first.values())[:l.k]
+        else:
+            res = client.query_points_groups(collection_name=collection, query=vecs.get(l.query),
+                                             query_filter=_lookup_filter(l), group_by="url",
+                                             limit=l.k, group_size=1, search_params=sp if l.query else None,
+                                             with_payload=_projection(client, collection, l.max_chars))
+            hits = [g.hits[0] for g in res.groups]
+        return _rows(client, collection, hits, l.max_chars)
+
+    if local or len(lookups) <= 1:
+        return [run(l) for l in lookups]
+    with ThreadPoolExecutor(max_workers=len(lookups)) as ex:
+        return list(ex.map(run, lookups))
+
+def retrieve_for_month(target_month: str, collection: str = "osiptel_news",
+                       window_months: int | None = None, engine: str | None = None):
     """
     target_month: 'YYYY-MM-01'
     Devuelve contexto: mismo mes año previo, mes previo y (si corresponde) cierre anual anterior.
+    window_months: limita las búsquedas vectoriales a notas de los últimos N meses
+    (p. ej. 13 → desde el mismo mes del año previo hasta el objetivo).
+    Resultados cacheados como en retrieve().
     """
+    return _cached("month", dict(target_month=target_month, window_months=window_months), collection, engine,
+                   lambda: _retrieve_for_month(target_month, collection, window_months, engine))
+
+def _retrieve_for_month(target_month, collection, window_months, engine):
     t = dt.date.fromisoformat(target_month)
     same_month_prev = t.replace(year=t.year - 1)
     # mes previo: cuidado con enero
     prev_month = (t.replace(day=1) - dt.timedelta(days=1)).replace(day=1)
-    ctx = []
 
-    # 1) mismo mes del año previo (ej. 2024-01-01)
-    ctx += _get_by_date(same_month_prev.isoformat())
-
-    # 2) mes previo (ej. 2024-12-01)
-    ctx += _get_by_date(prev_month.isoformat())
-
-    # 3) cierre anual del año previo (si existe en corpus): para enero, suele ser útil
+    lookups = [
+        Lookup(date=same_month_prev.isoformat(), k=4),   # 1) mismo mes del año previo (ej. 2024-01-01)
+        Lookup(date=prev_month.isoformat(), k=4),        # 2) mes previo (ej. 2024-12-01)
+    ]
+    # 3) cierre anual del año previo (si existe en corpus): para enero, suele ser útil.
+    # Muchas notas anuales se publican a inicios de enero siguiente; si tu CSV guarda el link
+    # anual como 'YYYY-12-01' ya sale en (2), si no, lo trae esta búsqueda vectorial.
+    win = dict(date_from=months_back(target_month, window_months - 1), date_to=target_month) if window_months else {}
     if t.month == 1:
-        # muchas notas anuales se publican a inicios de enero siguiente, pero puedes
-        # haber guardado 'date' como 'YYYY-12-01' para tu corpus; si no, haz vector fallback:
-        annual_vec = retrieve(query=f"portabilidad 2024 balance anual", k=1, collection=collection)
-
-        # si tienes guardado un link anual 2024 (p. ej. “6.3 millones en 2024”):
-        # añade manualmente _get_by_date("2024-12-01") si tu CSV lo usa así.
+        lookups.append(Lookup(query=f"portabilidad {t.year - 1} balance anual", k=1, **win))
+    fallback = Lookup(query=f"portabilidad reporte mensual {t.strftime('%B %Y')}", k=3, **win)
 
-        ctx += annual_vec
+    # Una sola llamada de embeddings (incluye el fallback) y lookups agrupados por URL
+    ctx = [c for res in retrieve_many(lookups, collection, also_embed=[fallback.query], engine=engine) for c in res]
 
-    # Fallbacks si falta algo: usa vector search mensual
+    # Fallbacks si falta algo: usa vector search mensual (embedding ya en caché)
     if not ctx:
-        ctx = retrieve(query=f"portabilidad reporte mensual {t.strftime('%B %Y')}", k=3, collection=collection)
+        ctx = retrieve_many([fallback], collection, engine=engine)[0]
 
-    # Quitar duplicados por URL
+    # Quitar duplicados por URL entre lookups (dentro de cada uno ya vienen agrupados)
     seen, dedup = set(), []
     for c in ctx:
         if c["url"] in seen: continue
         seen.add(c["url"]); dedup.append(c)
     # Limitar a 3–4 trozos
-    return dedup[:4]
\ No newline at end of file
+    return dedup[:4]
@@ -3,6 +3,8 @@ import json, argparse
 from eda.portabilidad import build_eda
 from writer.generate_news import generate_narrative
 from build_page import write_page
+from build_site import save_narrative
+from eda.artifact import load_eda
 from eval.compare_official import fetch_markdown, tfidf_cosine, check_numbers
 
 URLS_OFICIALES = {
@@ -14,11 +16,16 @@ ap = argparse.ArgumentParser()
 ap.add_argument("--excel", required=True)
 ap.add_argument("--target-month", required=True)  # ej: 2025-01-01
 ap.add_argument("--compare", action="store_true")
+ap.add_argument("--assets", choices=["cdn","inline","shared"], default=None,
+                help="CSS/JS de la página: CDN, embebidos (offline) o compartidos con hash (default: PAGE_ASSETS)")
+ap.add_argument("--charts", choices=["js","svg"], default=None,
+                help="Gráficos con Chart.js en el navegador o SVG prerenderado sin JS (default: PAGE_CHARTS)")
 args = ap.parse_args()
 
 eda_path = build_eda(args.excel, args.target_month)     # -> data/eda/eda_YYYY-MM.json
-narr = generate_narrative(json.loads(open(eda_path,"r",encoding="utf-8").read()))
-out_html = write_page(eda_path, narr)
+narr = generate_narrative(load_eda(eda_path))          # solo campos escalares del .bin
+save_narrative(narr, args.target_month)                 # -> data/narratives/ (para build_site)
+out_html = write_page(eda_path, narr, assets=args.assets, charts=args.charts)
 print("✅ HTML:", out_html)
 
 if args.compare:
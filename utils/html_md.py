@@ -0,0 +1,56 @@
+# utils/html_md.py
+"""
+Conversión HTML → Markdown con MarkItDown reutilizado (uno por hilo/proceso) y,
+opcionalmente, repartida en un pool de procesos (es trabajo CPU puro).
+"""
+from __future__ import annotations
+import os, atexit, threading
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+
+_local = threading.local()
+_pool: ProcessPoolExecutor | None = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+def converter():
+    """MarkItDown del hilo actual (se crea una sola vez; instanciarlo cuesta más que convertir una nota)."""
+    md = getattr(_local, "md", None)
+    if md is None:
+        from markitdown import MarkItDown
+        md = _local.md = MarkItDown()
+    return md
+
+def html_to_markdown(html: bytes) -> str:
+    return converter().convert_stream(BytesIO(html), extension=".html").text_content
+
+def _warm():
+    converter()
+
+def get_pool(processes: int | None = None) -> ProcessPoolExecutor:
+    """Pool de procesos compartido (lazy). Cada worker crea su MarkItDown al arrancar."""
+    global _pool, _pool_size
+    n = max(1, int(processes or int(os.getenv("CONVERT_PROCS", 0)) or os.cpu_count() or 1))
+    with _pool_lock:
+        if _pool is None or _pool_size != n:
+            if _pool is not None: _pool.shutdown(wait=True)
+            _pool, _pool_size = ProcessPoolExecutor(max_workers=n, initializer=_warm), n
+        return _pool
+
+def pool_convert(processes: int | None = None):
+    """Devuelve una función bytes -> str que convierte en el pool (bloquea al hilo que la llama)."""
+    pool = get_pool(processes)
+    return lambda html: pool.submit(html_to_markdown, html).result()
+
+def convert_many(htmls: list[bytes], processes: int | None = None) -> list[str]:
+    """Convierte una lista de HTML; processes=1 → en este proceso, sin pool."""
+    if processes == 1 or len(htmls) <= 1:
+        return [html_to_markdown(h) for h in htmls]
+    return list(get_pool(processes).map(html_to_markdown, htmls, chunksize=4))
+
+@atexit.register
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True); _pool = None
@@ -0,0 +1,122 @@
+# utils/page_assets.py
+"""
+Assets locales para las páginas de build_page (modo offline):
+
+- CSS: subconjunto "purgado" de Tailwind v3 con solo las utilidades que aparecen en el HTML
+  (preflight mínimo + reglas generadas para cada clase usada). No reemplaza al compilador de
+  Tailwind: cubre las utilidades de la plantilla (espaciado, grid, colores, tipografía).
+- JS: Chart.js minificado local (CHARTJS_PATH, o descargado una vez a data/cache/assets).
+- Modo compartido: archivos con hash de contenido en <outdir>/assets/ que reusan todas las páginas.
+"""
+from __future__ import annotations
+import os, re, hashlib, threading, requests
+from pathlib import Path
+
+CHARTJS_VERSION = "4.4.1"
+CHARTJS_URL = f"https://cdn.jsdelivr.net/npm/chart.js@{CHARTJS_VERSION}/dist/chart.umd.min.js"
+ASSET_CACHE = Path(os.getenv("PAGE_ASSET_CACHE", "data/cache/assets"))
+
+PREFLIGHT = (
+    "*,::before,::after{box-sizing:border-box;border:0 solid #e5e7eb}"
+    "html{line-height:1.5;-webkit-text-size-adjust:100%;font-family:ui-sans-serif,system-ui,-apple-system,"
+    "\"Segoe UI\",Roboto,\"Helvetica Neue\",Arial,sans-serif}"
+    "body{margin:0;line-height:inherit}"
+    "h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}"
+    "h1,h2,h3,h4,h5,h6,p,ul,ol,figure{margin:0}"
+    "ol,ul{list-style:none;padding:0}"
+    "table{text-indent:0;border-color:inherit;border-collapse:collapse}"
+    "small{font-size:80%}"
+    "img,svg,canvas{display:block;vertical-align:middle}"
+)
+
+COLORS = {
+    "white": "255 255 255", "black": "0 0 0",
+    "gray-50": "249 250 251", "gray-100": "243 244 246", "gray-200": "229 231 235", "gray-300": "209 213 219",
+    "gray-400": "156 163 175", "gray-500": "107 114 128", "gray-600": "75 85 99", "gray-700": "55 65 81",
+    "gray-800": "31 41 55", "gray-900": "17 24 39",
+    "red-600": "220 38 38", "red-700": "185 28 28", "green-600": "22 163 74", "green-700": "21 128 61",
+    "blue-600": "37 99 235", "blue-700": "29 78 216",
+}
+STATIC = {
+    "grid": "display:grid", "block": "display:block", "flex": "display:flex", "hidden": "display:none",
+    "items-center": "align-items:center", "justify-between": "justify-content:space-between",
+    "font-bold": "font-weight:700", "font-semibold": "font-weight:600", "font-medium": "font-weight:500",
+    "text-xs": "font-size:.75rem;line-height:1rem", "text-sm": "font-size:.875rem;line-height:1.25rem",
+    "text-base": "font-size:1rem;line-height:1.5rem", "text-lg": "font-size:1.125rem;line-height:1.75rem",
+    "text-xl": "font-size:1.25rem;line-height:1.75rem", "text-2xl": "font-size:1.5rem;line-height:2rem",
+    "text-center": "text-align:center", "text-left": "text-align:left", "text-right": "text-align:right",
+    "list-disc": "list-style-type:disc", "overflow-x-auto": "overflow-x:auto",
+    "min-w-full": "min-width:100%", "w-full": "width:100%", "h-full": "height:100%",
+}
+SPACING = {"p": ("padding",), "px": ("padding-left", "padding-right"), "py": ("padding-top", "padding-bottom"),
+           "pt": ("padding-top",), "pb": ("padding-bottom",), "pl": ("padding-left",), "pr": ("padding-right",),
+           "m": ("margin",), "mx": ("margin-left", "margin-right"), "my": ("margin-top", "margin-bottom"),
+           "mt": ("margin-top",), "mb": ("margin-bottom",), "ml": ("margin-left",), "mr": ("margin-right",),
+           "gap": ("gap",), "h": ("height",), "w": ("width",)}
+_SPACE = re.compile(r"(p|px|py|pt|pb|pl|pr|m|mx|my|mt|mb|ml|mr|gap|h|w)-(\d+(?:\.5)?)")
+
+def _rem(n: str) -> str:
+    v = f"{float(n)/4:g}"
+    return "0px" if v == "0" else (v[1:] if v.startswith("0.") else v) + "rem"
+
+def rule_for(cls: str) -> str | None:
+    """Declaraciones CSS de una utilidad Tailwind (None si no está cubierta)."""
+    if cls in STATIC: return STATIC[cls]
+    if m := _SPACE.fullmatch(cls):
+        return ";".join(f"{p}:{_rem(m.group(2))}" for p in SPACING[m.group(1)])
+    if m := re.fullmatch(r"grid-cols-(\d+)", cls):
+        return f"grid-template-columns:repeat({m.group(1)},minmax(0,1fr))"
+    if m := re.fullmatch(r"col-span-(\d+)", cls):
+        return f"grid-column:span {m.group(1)}/span {m.group(1)}"
+    if m := re.fullmatch(r"opacity-(\d+)", cls):
+        return f"opacity:{int(m.group(1))/100:g}"
+    if m := re.fullmatch(r"(text|bg)-(.+)", cls):
+        if m.group(2) in COLORS:
+            return f"{'color' if m.group(1) == 'text' else 'background-color'}:rgb({COLORS[m.group(2)]})"
+    return None
+
+def used_classes(html: str) -> list[str]:
+    """Clases de los atributos class="..." / class='...' del HTML, en orden de aparición."""
+    seen = {}
+    for m in re.finditer(r"""class=(["'])(.*?)\1""", html, re.S):
+        for c in m.group(2).split():
+            seen.setdefault(c, None)
+    return list(seen)
+
+def purge_css(classes) -> tuple[str, list[str]]:
+    """(CSS con preflight + reglas de las clases cubiertas, clases sin regla)."""
+    rules, unknown = [], []
+    for c in classes:
+        r = rule_for(c)
+        if r is None: unknown.append(c)
+        else: rules.append(f".{c}{{{r}}}")
+    return PREFLIGHT + "".join(rules), unknown
+
+def chartjs_source() -> str:
+    """Chart.js minificado local: CHARTJS_PATH, caché en disco o descarga única desde el CDN."""
+    env = os.getenv("CHARTJS_PATH")
+    path = Path(env) if env else ASSET_CACHE/f"chart-{CHARTJS_VERSION}.umd.min.js"
+    if not path.exists():
+        if env:
+            raise FileNotFoundError(f"[page_assets] CHARTJS_PATH={env} no existe")
+        try:
+            r = requests.get(CHARTJS_URL, timeout=30)
+            r.raise_for_status()
+        except requests.RequestException as e:
+            raise RuntimeError(f"[page_assets] sin Chart.js local ({path}) y no se pudo descargar: {e}. "
+                               f"Copia chart.umd.min.js {CHARTJS_VERSION} y define CHARTJS_PATH.") from e
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(r.content)
+    return path.read_text(encoding="utf-8")
+
+def shared_asset(outdir: str | Path, stem: str, content: str, ext: str) -> str:
+    """Escribe <outdir>/assets/<stem>.<hash>.<ext> (si no existe) y devuelve la ruta relativa."""
+    h = hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+    rel = f"assets/{stem}.{h}.{ext}"
+    p = Path(outdir)/rel
+    if not p.exists():
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")   # build_site escribe en paralelo
+        tmp.write_text(content, encoding="utf-8")
+        tmp.replace(p)
+    return rel
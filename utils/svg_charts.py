@@ -0,0 +1,91 @@
+# utils/svg_charts.py
+"""
+Gráficos SVG prerenderados en build time (sin JS) para build_page: barras de líneas portadas y
+líneas de neto por operadora. Mismo formato numérico que los tooltips de Chart.js
+(Intl.NumberFormat('es-PE') = miles con coma) y tooltips nativos con <title>.
+"""
+from __future__ import annotations
+import math
+from html import escape
+
+# Paleta por defecto de Chart.js v4 (plugin colors), en el orden de los datasets
+CHARTJS_COLORS = ["#36a2eb", "#ff6384", "#4bc0c0", "#ff9f40", "#9966ff", "#ffcd56", "#c9cbcf"]
+GRID, TEXT, FONT = "#e5e5e5", "#666", "font-family:ui-sans-serif,system-ui,sans-serif;font-size:12px"
+
+def fmt_es_pe(v) -> str:
+    """1234567 -> '1,234,567' (como Intl.NumberFormat('es-PE') para enteros)."""
+    return f"{int(round(v)):,}"
+
+def nice_ticks(lo: float, hi: float, n: int = 5) -> list[float]:
+    """Marcas 'redondas' (1/2/5 x 10^k) que cubren [lo, hi]."""
+    if hi == lo: hi = lo + 1
+    raw = (hi - lo) / max(n, 1)
+    mag = 10 ** math.floor(math.log10(raw))
+    step = next(m*mag for m in (1, 2, 5, 10) if m*mag >= raw)
+    start, end = math.floor(lo/step)*step, math.ceil(hi/step)*step
+    return [start + i*step for i in range(int(round((end-start)/step)) + 1)]
+
+def _frame(width, height, ticks, y, left, right, top):
+    out = []
+    for t in ticks:
+        yy = y(t)
+        out.append(f'<line x1="{left}" x2="{width-right}" y1="{yy:.1f}" y2="{yy:.1f}" stroke="{GRID}"/>'
+                   f'<text x="{left-8}" y="{yy+4:.1f}" text-anchor="end">{fmt_es_pe(t)}</text>')
+    return "".join(out)
+
+CHAR_W = 7   # ancho medio aproximado de un carácter a 12px
+
+def _x_labels(labels, x, y0, spacing):
+    """Etiquetas del eje x; si no caben en `spacing` px se dibuja una de cada k (como autoSkip de Chart.js)."""
+    label_w = CHAR_W*max((len(str(l)) for l in labels), default=0) + 8
+    k = max(1, math.ceil(label_w / spacing)) if spacing > 0 else 1
+    return "".join(f'<text x="{x(i):.1f}" y="{y0+18}" text-anchor="middle">{escape(str(l))}</text>'
+                   for i, l in enumerate(labels) if i % k == 0)
+
+def _svg(width, height, label, body):
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {width} {height}" width="100%" height="100%" '
+            f'role="img" aria-label="{escape(label)}" style="{FONT}" fill="{TEXT}">{body}</svg>')
+
+def bar_chart(labels, values, width: int = 700, height: int = 320, color: str = "#0076CE",
+              unit: str = "líneas", title: str = "Líneas portadas") -> str:
+    """Barras verticales desde cero; tooltip '<n> líneas' por barra."""
+    left, right, top, bottom = 64, 8, 10, 28
+    ticks = nice_ticks(0, max([0, *values]))
+    lo, hi = ticks[0], ticks[-1]
+    y = lambda v: top + (hi - v) / (hi - lo) * (height - top - bottom)
+    band = (width - left - right) / max(len(values), 1)
+    bw = min(36, band*0.8)
+    x = lambda i: left + band*(i + 0.5)
+    bars = "".join(
+        f'<rect x="{x(i)-bw/2:.1f}" y="{y(v):.1f}" width="{bw:.1f}" height="{y(0)-y(v):.1f}" fill="{color}">'
+        f'<title>{escape(str(l))}: {fmt_es_pe(v)} {unit}</title></rect>'
+        for i, (l, v) in enumerate(zip(labels, values)))
+    return _svg(width, height, title, _frame(width, height, ticks, y, left, right, top) + bars
+                + _x_labels(labels, x, y(lo), band))
+
+def line_chart(labels, series: dict, width: int = 1200, height: int = 320, colors=None,
+               title: str = "Resultado neto por operadora") -> str:
+    """Una línea por serie (con leyenda arriba, como Chart.js) y tooltip por punto."""
+    colors = colors or CHARTJS_COLORS
+    left, right, top, bottom = 72, 12, 34, 28
+    allv = [v for vals in series.values() for v in vals] or [0]
+    ticks = nice_ticks(min(0, *allv), max(0, *allv))
+    lo, hi = ticks[0], ticks[-1]
+    y = lambda v: top + (hi - v) / (hi - lo) * (height - top - bottom)
+    n = max(len(labels), 1)
+    x = lambda i: left + (width - left - right) * (i / (n - 1) if n > 1 else 0.5)
+    body = [_frame(width, height, ticks, y, left, right, top),
+            f'<line x1="{left}" x2="{width-right}" y1="{y(0):.1f}" y2="{y(0):.1f}" stroke="#bbb"/>']
+    legend_w = 110
+    lx = (width - legend_w*len(series)) / 2
+    for k, (name, vals) in enumerate(series.items()):
+        c = colors[k % len(colors)]
+        pts = " ".join(f"{x(i):.1f},{y(v):.1f}" for i, v in enumerate(vals))
+        body.append(f'<polyline points="{pts}" fill="none" stroke="{c}" stroke-width="2"/>')
+        body.extend(f'<circle cx="{x(i):.1f}" cy="{y(v):.1f}" r="3" fill="{c}">'
+                    f'<title>{escape(name)} {escape(str(labels[i]))}: {fmt_es_pe(v)}</title></circle>'
+                    for i, v in enumerate(vals))
+        body.append(f'<rect x="{lx+k*legend_w:.1f}" y="8" width="30" height="10" fill="none" stroke="{c}" stroke-width="2"/>'
+                    f'<text x="{lx+k*legend_w+36:.1f}" y="17">{escape(name)}</text>')
+    body.append(_x_labels(labels, x, y(lo), (width - left - right) / max(n - 1, 1)))
+    return _svg(width, height, title, "".join(body))
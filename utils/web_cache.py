@@ -0,0 +1,132 @@
+# utils/web_cache.py
+"""
+Caché local de páginas (HTML crudo + Markdown convertido) por URL, compartida por la
+ingesta RAG y el comparador con la nota oficial.
+
+- Dentro de WEB_CACHE_TTL (s) se sirve del disco sin tocar la red.
+- Pasado el TTL se revalida con If-None-Match / If-Modified-Since (304 = sin descarga).
+- Sin red (o WEB_CACHE_OFFLINE=1) se sirve lo que haya en disco.
+- Tope de tamaño WEB_CACHE_MAX_MB; se desalojan primero las entradas menos usadas.
+"""
+from __future__ import annotations
+import os, json, time, hashlib, threading, requests
+from pathlib import Path
+from .html_md import html_to_markdown
+
+CACHE_DIR = Path(os.getenv("WEB_CACHE_DIR", "data/cache/web"))
+TTL = float(os.getenv("WEB_CACHE_TTL", 24*3600))
+MAX_BYTES = int(float(os.getenv("WEB_CACHE_MAX_MB", 200)) * 1024 * 1024)
+
+_stats = {"hit": 0, "revalidated": 0, "miss": 0, "offline": 0}
+_lock = threading.Lock()
+
+def _offline() -> bool:
+    return os.getenv("WEB_CACHE_OFFLINE", "").lower() in ("1", "true", "yes")
+
+def _key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+def _paths(url: str):
+    k = _key(url)
+    return CACHE_DIR/f"{k}.json", CACHE_DIR/f"{k}.html", CACHE_DIR/f"{k}.md"
+
+def _write(path: Path, data: bytes):
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)   # atómico: nunca se lee un archivo a medio escribir
+
+def _read_meta(p: Path) -> dict | None:
+    try:
+        return json.loads(p.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def _save_meta(p: Path, meta: dict):
+    _write(p, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+def _touch(p: Path):
+    # mtime del .json = último uso (orden de desalojo)
+    try: os.utime(p)
+    except OSError: pass
+
+def get_html(url: str, timeout: int = 60) -> bytes:
+    """HTML de `url` desde caché (revalidando si venció el TTL) o desde la red."""
+    meta_p, html_p, _ = _paths(url)
+    meta = _read_meta(meta_p)
+    cached = meta is not None and html_p.exists()
+    if cached and (_offline() or time.time() - meta.get("checked_at", 0) < TTL):
+        _stats["hit"] += 1; _touch(meta_p)
+        return html_p.read_bytes()
+    if _offline():
+        raise FileNotFoundError(f"[web_cache] sin copia local y WEB_CACHE_OFFLINE=1: {url}")
+
+    headers = {}
+    if cached and meta.get("etag"): headers["If-None-Match"] = meta["etag"]
+    if cached and meta.get("last_modified"): headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        r = requests.get(url, headers=headers, timeout=timeout)
+        if r.status_code == 304 and cached:
+            _stats["revalidated"] += 1
+            meta["checked_at"] = time.time(); _save_meta(meta_p, meta)
+            return html_p.read_bytes()
+        r.raise_for_status()
+    except requests.RequestException:
+        if cached:   # red caída: mejor una copia vieja que nada
+            _stats["offline"] += 1; _touch(meta_p)
+            return html_p.read_bytes()
+        raise
+
+    _stats["miss"] += 1
+    html = r.content
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    _write(html_p, html)
+    _save_meta(meta_p, {
+        "url": url,
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+        "checked_at": time.time(),
+        "html_sha": hashlib.sha256(html).hexdigest(),
+        "md_sha": (meta or {}).get("md_sha"),
+    })
+    _evict()
+    return html
+
+def get_markdown(url: str, convert=None, timeout: int = 60) -> str:
+    """
+    Markdown de `url`. Se reconvierte solo si el HTML cambió (md_sha != html_sha).
+    convert: función bytes -> str (por defecto MarkItDown reutilizado, ver utils/html_md).
+    """
+    html = get_html(url, timeout=timeout)
+    meta_p, _, md_p = _paths(url)
+    meta = _read_meta(meta_p) or {}
+    sha = meta.get("html_sha") or hashlib.sha256(html).hexdigest()
+    if meta.get("md_sha") == sha and md_p.exists():
+        return md_p.read_text(encoding="utf-8")
+    md = (convert or html_to_markdown)(html)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    _write(md_p, md.encode("utf-8"))
+    if meta:
+        meta["md_sha"] = sha; _save_meta(meta_p, meta)
+    return md
+
+def _evict(max_bytes: int | None = None):
+    """Borra entradas (json/html/md) por orden de último uso hasta quedar bajo el tope."""
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    with _lock:
+        files = [p for p in CACHE_DIR.glob("*") if p.is_file() and not p.name.endswith(".tmp")]
+        total = sum(p.stat().st_size for p in files)
+        if total <= max_bytes: return
+        metas = sorted((p for p in files if p.suffix == ".json"), key=lambda p: p.stat().st_mtime)
+        for m in metas:
+            for p in (m, m.with_suffix(".html"), m.with_suffix(".md")):
+                if p.exists():
+                    total -= p.stat().st_size; p.unlink(missing_ok=True)
+            if total <= max_bytes: break
+
+def cache_stats() -> dict:
+    return dict(_stats)
+
+if __name__ == "__main__":
+    files = list(CACHE_DIR.glob("*.json")) if CACHE_DIR.exists() else []
+    size = sum(p.stat().st_size for p in CACHE_DIR.glob("*")) if CACHE_DIR.exists() else 0
+    print(f"{CACHE_DIR}: {len(files)} URLs, {size/1024/1024:.1f} MB (tope {MAX_BYTES/1024/1024:.0f} MB)")